@@ -0,0 +1,182 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import time
+
+from fdk import constants
+from fdk import log
+
+
+__limiter__ = None
+
+
+class Rejected(Exception):
+
+    def __init__(self, status, message):
+        """
+        Invocation was not admitted
+        :param status: HTTP status code
+        :param message: error message
+        """
+        super(Rejected, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ConcurrencyLimiter(object):
+
+    def __init__(self, max_concurrency, max_queue,
+                 alpha=constants.SERVICE_TIME_EWMA_ALPHA):
+        """
+        Limits a number of concurrent invocations,
+        invocations over the limit wait in a bounded queue
+        :param max_concurrency: number of concurrent invocations
+        :type max_concurrency: int
+        :param max_queue: number of invocations allowed to wait
+        :type max_queue: int
+        :param alpha: service time EWMA smoothing factor
+        :type alpha: float
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.alpha = alpha
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.service_time = None
+        self._slots = None
+
+    def slots(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    def stats(self):
+        """
+        Returns limiter counters
+        :return: counters
+        :rtype: dict
+        """
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "service_time": self.service_time,
+        }
+
+    def reject_deadline(self, time_left):
+        self.rejected_deadline += 1
+        log.log("rejecting invocation, {0:.3f}s left, "
+                "service time: {1}, stats: {2}"
+                .format(time_left, self.service_time, self.stats()))
+        raise Rejected(504, "not enough time left before the deadline")
+
+    def reject_queue_full(self):
+        self.rejected_queue_full += 1
+        log.log("rejecting invocation, queue is full, stats: {0}"
+                .format(self.stats()))
+        raise Rejected(503, "too many concurrent invocations")
+
+    async def acquire(self, time_left):
+        """
+        Waits for a free slot
+        :param time_left: number of seconds left before the deadline
+        :type time_left: float
+        :return: None
+        """
+        service_time = self.service_time or 0.0
+        if time_left <= service_time:
+            self.reject_deadline(time_left)
+
+        slots = self.slots()
+        if slots.locked():
+            if self.queue_depth >= self.max_queue:
+                self.reject_queue_full()
+            self.queue_depth += 1
+            try:
+                await asyncio.wait_for(
+                    slots.acquire(), time_left - service_time)
+            except asyncio.TimeoutError:
+                self.reject_deadline(0)
+            finally:
+                self.queue_depth -= 1
+        else:
+            await slots.acquire()
+
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self, elapsed):
+        """
+        Frees a slot and accounts an invocation's service time
+        :param elapsed: invocation service time in seconds
+        :type elapsed: float
+        :return: None
+        """
+        self.in_flight -= 1
+        if self.service_time is None:
+            self.service_time = elapsed
+        else:
+            self.service_time += self.alpha * (elapsed - self.service_time)
+        self.slots().release()
+
+    async def slot(self, task, time_left):
+        """
+        Waits for a free slot that is held until a task is done,
+        e.g. a request handler that writes a streamed response
+        after the function has returned
+        :param task: task to hold the slot for
+        :type task: asyncio.Task
+        :param time_left: number of seconds left before the deadline
+        :type time_left: float
+        :return: None
+        """
+        await self.acquire(time_left)
+        started = time.monotonic()
+        task.add_done_callback(
+            lambda _: self.release(time.monotonic() - started))
+
+
+def get_limiter():
+    """
+    Returns a concurrency limiter if admission control is on
+    :return: limiter
+    :rtype: ConcurrencyLimiter
+    """
+    return __limiter__
+
+
+def start():
+    """
+    Creates a concurrency limiter if FDK_MAX_CONCURRENCY is set
+    :return: limiter
+    :rtype: ConcurrencyLimiter
+    """
+    global __limiter__
+    max_concurrency = constants.int_env(constants.FDK_MAX_CONCURRENCY, 0)
+    if max_concurrency == 0:
+        return None
+    max_queue = constants.int_env(constants.FDK_MAX_QUEUE,
+                                  constants.DEFAULT_MAX_QUEUE)
+    log.log("admission control on, concurrency: {0}, queue: {1}"
+            .format(max_concurrency, max_queue))
+    __limiter__ = ConcurrencyLimiter(max_concurrency, max_queue)
+    return __limiter__
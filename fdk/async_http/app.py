@@ -22,9 +22,13 @@ from traceback import format_exc
 from .exceptions import AsyncHTTPException
 from .error_handler import ErrorHandler
 from .request import Request
-from .response import HTTPResponse, StreamingHTTPResponse
+from .response import (
+    BaseHTTPResponse, FileHTTPResponse, HTTPResponse, StreamingHTTPResponse
+)
 from .server import serve
 
+from fdk import constants
+
 logger = logging.getLogger(__name__)
 
 
@@ -78,12 +82,14 @@ class AsyncHTTPServer(object):
             response = handler(request)
             logger.debug("got response from function")
             res = await response
-            body = res.body
-            headers = res.headers
-            status = res.status
-            response = HTTPResponse(
-                body_bytes=body, status=status, headers=headers,
-            )
+            if isinstance(res, BaseHTTPResponse):
+                # handler's response is written as it is
+                response = res
+            else:
+                response = HTTPResponse(
+                    body_bytes=res.body, status=res.status,
+                    headers=res.headers,
+                )
         except CancelledError:
             response = None
             cancelled = True
@@ -107,13 +113,22 @@ class AsyncHTTPServer(object):
             if cancelled:
                 raise CancelledError()
 
-        if isinstance(response, StreamingHTTPResponse):
+        if isinstance(response, (StreamingHTTPResponse, FileHTTPResponse)):
             await stream_callback(response)
         else:
             write_callback(response)
 
-    def run(self, sock=None, loop=None):
+    def run(self, sock=None, loop=None, before_start=None, after_stop=None,
+            request_max_size=constants.DEFAULT_REQUEST_MAX_SIZE,
+            request_spill_size=None):
+        self.is_request_stream = self.router.is_request_stream
         return serve(
             self.handle_request, ErrorHandler(),
-            sock=sock, loop=loop
+            sock=sock, loop=loop,
+            is_request_stream=self.is_request_stream,
+            router=self.router,
+            before_start=before_start,
+            after_stop=after_stop,
+            request_max_size=request_max_size,
+            request_spill_size=request_spill_size,
         )
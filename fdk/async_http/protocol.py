@@ -15,6 +15,7 @@
 #
 
 import asyncio
+import collections
 import sys
 import traceback
 
@@ -30,7 +31,9 @@ from .exceptions import (
 )
 
 from .request import Request, StreamBuffer
-from .response import HTTPResponse
+from .response import HTTPResponse, body_length
+
+from fdk.headers import Headers, header_name
 
 import logging
 logger = logging.getLogger(__name__)
@@ -43,10 +46,24 @@ except ImportError:
     pass
 
 
+# updated once a second by the server, see server.update_current_time
 current_time = None
 
+# the socket is read into a buffer of this size, bodies that do not fit
+# a single read are preallocated from Content-Length and read in place,
+# bodies larger than request_spill_size go to a temporary file instead
+RECEIVE_BUFFER_SIZE = 65536
+
+# requests a client may send ahead of responses before the connection
+# stops being read, requests are handled one by one in their order
+PIPELINE_DEPTH = 16
+
+# transports send a list of buffers with vectored I/O since Python 3.12,
+# older ones join the buffers into a single bytes object first
+VECTORED_WRITES = sys.version_info >= (3, 12)
 
-class HttpProtocol(asyncio.Protocol):
+
+class HttpProtocol(asyncio.BufferedProtocol):
     """
     This class provides a basic HTTP implementation.
     """
@@ -54,6 +71,7 @@ class HttpProtocol(asyncio.Protocol):
     __slots__ = (
         # event loop, connection
         "loop",
+        "timers",
         "transport",
         "connections",
         "signal",
@@ -62,12 +80,18 @@ class HttpProtocol(asyncio.Protocol):
         "request",
         "url",
         "headers",
+        "_incoming",
+        "_parsing",
+        "_pipeline",
+        "_pipeline_paused",
+        "_rejected",
         # request config
         "request_handler",
         "request_timeout",
         "response_timeout",
         "keep_alive_timeout",
         "request_max_size",
+        "request_spill_size",
         "request_buffer_queue_size",
         "request_class",
         "is_request_stream",
@@ -86,8 +110,11 @@ class HttpProtocol(asyncio.Protocol):
         "_not_paused",
         "_request_handler_task",
         "_request_stream_task",
+        "_stream_backlog",
         "_keep_alive",
         "_header_fragment",
+        "_receive_buffer",
+        "_body_in_place",
         "state",
         "_debug",
     )
@@ -104,6 +131,7 @@ class HttpProtocol(asyncio.Protocol):
         response_timeout=60,
         keep_alive_timeout=5,
         request_max_size=None,
+        request_spill_size=None,
         request_buffer_queue_size=100,
         request_class=None,
         access_log=True,
@@ -112,14 +140,21 @@ class HttpProtocol(asyncio.Protocol):
         router=None,
         state=None,
         debug=False,
+        timers=None,
         **kwargs
     ):
         self.loop = loop
+        # connection timeouts go to a shared timer wheel if there is one
+        self.timers = timers if timers is not None else loop
         self.transport = None
         self.request = None
         self.parser = None
         self.url = None
         self.headers = None
+        self._incoming = None
+        self._parsing = False
+        self._pipeline = collections.deque()
+        self._pipeline_paused = False
         self.router = router
         self.signal = signal
         self.access_log = access_log
@@ -131,6 +166,7 @@ class HttpProtocol(asyncio.Protocol):
         self.response_timeout = response_timeout
         self.keep_alive_timeout = keep_alive_timeout
         self.request_max_size = request_max_size
+        self.request_spill_size = request_spill_size
         self.request_class = request_class or Request
         self.is_request_stream = is_request_stream
         self._is_stream_handler = False
@@ -139,6 +175,7 @@ class HttpProtocol(asyncio.Protocol):
         else:
             self._not_paused = asyncio.Event(loop=loop)
         self._total_request_size = 0
+        self._rejected = False
         self._request_timeout_handler = None
         self._response_timeout_handler = None
         self._keep_alive_timeout_handler = None
@@ -146,8 +183,11 @@ class HttpProtocol(asyncio.Protocol):
         self._last_response_time = None
         self._request_handler_task = None
         self._request_stream_task = None
+        self._stream_backlog = collections.deque()
         self._keep_alive = keep_alive
         self._header_fragment = b""
+        self._receive_buffer = None
+        self._body_in_place = None
         self.state = state if state else {}
         if "requests_count" not in self.state:
             self.state["requests_count"] = 0
@@ -159,14 +199,15 @@ class HttpProtocol(asyncio.Protocol):
         """
         Check if the connection needs to be kept alive based on the params
         attached to the `_keep_alive` attribute, :attr:`Signal.stopped`
-        and :func:`HttpProtocol.parser.should_keep_alive`
+        and the keep-alive flag of the request being responded to
 
         :return: ``True`` if connection is to be kept alive ``False`` else
         """
         return (
             self._keep_alive
             and not self.signal.stopped
-            and self.parser.should_keep_alive()
+            and self.request is not None
+            and self.request.keep_alive
         )
 
     # -------------------------------------------- #
@@ -175,7 +216,7 @@ class HttpProtocol(asyncio.Protocol):
 
     def connection_made(self, transport):
         self.connections.add(self)
-        self._request_timeout_handler = self.loop.call_later(
+        self._request_timeout_handler = self.timers.call_later(
             self.request_timeout, self.request_timeout_callback
         )
         self.transport = transport
@@ -183,10 +224,19 @@ class HttpProtocol(asyncio.Protocol):
 
     def connection_lost(self, exc):
         self.connections.discard(self)
+        if self.request and self._request_handler_task and \
+                not self._request_handler_task.done():
+            # the response was not written, let the handler know
+            self.request.disconnected()
         if self._request_handler_task:
             self._request_handler_task.cancel()
         if self._request_stream_task:
             self._request_stream_task.cancel()
+        for request in (self._incoming, *self._pipeline):
+            # requests that never got to a handler
+            if request is not None and not isinstance(request, Exception):
+                request.body_close()
+        self._pipeline.clear()
         if self._request_timeout_handler:
             self._request_timeout_handler.cancel()
         if self._response_timeout_handler:
@@ -208,7 +258,7 @@ class HttpProtocol(asyncio.Protocol):
         time_elapsed = current_time - self._last_request_time
         if time_elapsed < self.request_timeout:
             time_left = self.request_timeout - time_elapsed
-            self._request_timeout_handler = self.loop.call_later(
+            self._request_timeout_handler = self.timers.call_later(
                 time_left, self.request_timeout_callback
             )
         else:
@@ -224,7 +274,7 @@ class HttpProtocol(asyncio.Protocol):
         time_elapsed = current_time - self._last_request_time
         if time_elapsed < self.response_timeout:
             time_left = self.response_timeout - time_elapsed
-            self._response_timeout_handler = self.loop.call_later(
+            self._response_timeout_handler = self.timers.call_later(
                 time_left, self.response_timeout_callback
             )
         else:
@@ -253,7 +303,7 @@ class HttpProtocol(asyncio.Protocol):
         """
         time_left = self.keep_alive_time_left()
         if time_left >= 0:
-            self._keep_alive_timeout_handler = self.loop.call_later(
+            self._keep_alive_timeout_handler = self.timers.call_later(
                 time_left, self.keep_alive_timeout_callback
             )
         else:
@@ -265,94 +315,167 @@ class HttpProtocol(asyncio.Protocol):
     # Parsing
     # -------------------------------------------- #
 
+    def get_buffer(self, sizehint):
+        if self._incoming is not None and not self._is_stream_handler:
+            body = self._incoming.body_buffer(RECEIVE_BUFFER_SIZE)
+            if body is not None:
+                self._body_in_place = body
+                return body
+        self._body_in_place = None
+        if self._receive_buffer is None:
+            self._receive_buffer = memoryview(bytearray(RECEIVE_BUFFER_SIZE))
+        return self._receive_buffer
+
+    def buffer_updated(self, nbytes):
+        if self._body_in_place is None:
+            self.data_received(self._receive_buffer[:nbytes])
+            return
+        # on_body gets these bytes back from the parser,
+        # they are at their place in the body already
+        self._body_in_place = self._body_in_place[:nbytes]
+        try:
+            self.data_received(self._body_in_place)
+        finally:
+            self._body_in_place = None
+
     def data_received(self, data):
-        # Check for the request itself getting too large and exceeding
-        # memory limits
-        self._total_request_size += len(data)
-        # if self._total_request_size > self.request_max_size:
-        #     self.write_error(PayloadTooLarge("Payload Too Large"))
+        if self._rejected:
+            # the rest of a request that is too large
+            return
 
-        # Create parser if this is the first time we're receiving data
+        # Create parser if this is the first time we're receiving data,
+        # it is reused by every request on the connection
         if self.parser is None:
-            assert self.request is None
-            self.headers = []
             self.parser = HttpRequestParser(self)
 
         # requests count
         self.state["requests_count"] = self.state["requests_count"] + 1
 
         # Parse request chunk or close connection
+        rejected = None
         try:
             self.parser.feed_data(data)
-        except HttpParserError:
-            message = "Bad Request"
-            if self._debug:
-                message += "\n" + traceback.format_exc()
-            self.write_error(InvalidUsage(message))
+        except HttpParserError as ex:
+            if not isinstance(ex.__context__, PayloadTooLarge):
+                message = "Bad Request"
+                if self._debug:
+                    message += "\n" + traceback.format_exc()
+                self.write_error(InvalidUsage(message))
+                return
+            # raised by a parser callback to stop parsing
+            rejected = ex.__context__
+        if rejected is not None:
+            # handled out of the parser error, it is the caller's fault
+            self.reject(rejected)
+
+    def on_message_begin(self):
+        self._parsing = True
+        self._total_request_size = 0
+        self.url = None
+        self.headers = Headers()
+        self._header_fragment = b""
+        self._is_stream_handler = False
 
     def on_url(self, url):
+        self.check_request_size(len(url))
         if not self.url:
             self.url = url
         else:
             self.url += url
 
     def on_header(self, name, value):
+        self.check_request_size(len(name) + len(value or b""))
         self._header_fragment += name
 
         if value is not None:
-            if (
-                self._header_fragment == b"Content-Length"
-                and int(value) > self.request_max_size
-            ):
-                self.write_error(PayloadTooLarge("Payload Too Large"))
             try:
                 value = value.decode()
             except UnicodeDecodeError:
                 value = value.decode("latin_1")
-            self.headers.append(
-                (self._header_fragment.decode().casefold(), value)
-            )
+            # the request keeps these headers, they are not copied
+            self.headers.append(header_name(self._header_fragment), value)
 
             self._header_fragment = b""
 
     def on_headers_complete(self):
-        self.request = self.request_class(
+        request = self.request_class(
             url_bytes=self.url,
-            headers=dict(self.headers),
+            headers=self.headers,
             version=self.parser.get_http_version(),
             method=self.parser.get_method().decode(),
             transport=self.transport,
         )
+        # the parser moves on to pipelined requests, if any,
+        # before this one is responded to
+        request.keep_alive = self.parser.should_keep_alive()
+        self._incoming = request
         # Remove any existing KeepAlive handler here,
         # It will be recreated if required on the new request.
         if self._keep_alive_timeout_handler:
             self._keep_alive_timeout_handler.cancel()
             self._keep_alive_timeout_handler = None
+
+        content_length = self.headers.get("content-length")
+        if content_length is not None:
+            content_length = int(content_length)
+            # rejected before any of the body is read
+            self.check_request_size(content_length, declared=True)
+
         if self.is_request_stream:
-            self._is_stream_handler = self.router.is_stream_handler(
-                self.request
-            )
+            self._is_stream_handler = self.router.is_stream_handler(request)
             if self._is_stream_handler:
-                self.request.stream = StreamBuffer(
+                request.stream = StreamBuffer(
                     self.request_buffer_queue_size
                 )
-                self.execute_request_handler()
+                self.handle_in_order(request)
+                return
+
+        if content_length is not None:
+            if self.request_spill_size and \
+                    content_length > self.request_spill_size:
+                request.body_spill()
+            elif content_length > RECEIVE_BUFFER_SIZE:
+                request.body_allocate(content_length)
 
     def on_body(self, body):
+        # chunked bodies do not declare their length
+        self.check_request_size(len(body))
         if self.is_request_stream and self._is_stream_handler:
-            self._request_stream_task = self.loop.create_task(
-                self.body_append(body)
-            )
-        else:
-            self.request.body_push(body)
-
-    async def body_append(self, body):
-        if self.request.stream.is_full():
-            self.transport.pause_reading()
-            await self.request.stream.put(body)
-            self.transport.resume_reading()
+            self.stream_append(body)
         else:
-            await self.request.stream.put(body)
+            request = self._incoming
+            request.body_push(body, in_place=self._body_in_place is not None)
+            if self.request_spill_size and \
+                    request.body_size > self.request_spill_size:
+                # a body of unknown length, i.e. a chunked one, got large
+                request.body_spill()
+
+    def stream_append(self, body):
+        """
+        Passes a body chunk to a stream handler in order,
+        stops reading from the socket while the stream is full
+        """
+        stream = self._incoming.stream
+        if not self._stream_backlog and not stream.is_full():
+            stream.put_nowait(body)
+            return
+        self._stream_backlog.append((stream, body))
+        if self._request_stream_task is None or \
+                self._request_stream_task.done():
+            self._request_stream_task = self.loop.create_task(
+                self.stream_drain())
+
+    async def stream_drain(self):
+        while self._stream_backlog:
+            stream, body = self._stream_backlog.popleft()
+            if stream.is_full():
+                self.transport.pause_reading()
+                await stream.put(body)
+                if self.transport is not None and \
+                        not self._pipeline_paused and not self._rejected:
+                    self.transport.resume_reading()
+            else:
+                stream.put_nowait(body)
 
     def on_message_complete(self):
         # Entire request (headers and whole body) is received.
@@ -360,13 +483,91 @@ class HttpProtocol(asyncio.Protocol):
         if self._request_timeout_handler:
             self._request_timeout_handler.cancel()
             self._request_timeout_handler = None
+        request = self._incoming
+        self._parsing = False
         if self.is_request_stream and self._is_stream_handler:
-            self._request_stream_task = self.loop.create_task(
-                self.request.stream.put(None)
-            )
+            self.stream_append(None)
+            self._incoming = None
             return
-        self.request.body_finish()
+        self._incoming = None
+        request.body_finish()
+        self.handle_in_order(request)
+
+    def check_request_size(self, size, declared=False):
+        """
+        Counts bytes of the request being parsed against the size limit
+
+        :param size: number of bytes received
+        :param declared: the size is a declared body length, it is checked
+            but not counted, the body is counted as it arrives
+        :raises PayloadTooLarge: if the request is over the limit
+        :return: None
+        """
+        total = self._total_request_size + size
+        if self.request_max_size is not None and \
+                total > self.request_max_size:
+            raise PayloadTooLarge("Payload Too Large")
+        if not declared:
+            self._total_request_size = total
+
+    def reject(self, exception):
+        """
+        Stops reading a request that is over the size limit,
+        responds with an error once pipelined requests that came first
+        are responded to and closes the connection
+
+        :param exception: error to respond with
+        :return: None
+        """
+        self._rejected = True
+        self._parsing = False
+        self.transport.pause_reading()
+        request = self._incoming
+        if self.request is None or self.request is request:
+            # a stream handler might have got the request already
+            self.write_error(exception)
+        else:
+            self._pipeline.append(exception)
+        self._incoming = None
+
+    def handle_in_order(self, request):
+        """
+        Handles a request right away if no other request is being
+        responded to, or queues it after pipelined requests that came first
+
+        :param request: request to handle
+        :return: None
+        """
+        if self.request is None:
+            self.request = request
+            self.execute_request_handler()
+            return
+        self._pipeline.append(request)
+        if len(self._pipeline) >= PIPELINE_DEPTH and \
+                not self._pipeline_paused:
+            self._pipeline_paused = True
+            self.transport.pause_reading()
+
+    def handle_next(self):
+        """
+        Handles the next pipelined request once a response is written
+
+        :return: True if there was a request to handle
+        """
+        if not self._pipeline:
+            return False
+        if self._pipeline_paused and self.transport is not None:
+            self._pipeline_paused = False
+            if not self._rejected:
+                self.transport.resume_reading()
+        request = self._pipeline.popleft()
+        if isinstance(request, Exception):
+            # a request rejected while the ones before it were handled
+            self.write_error(request)
+            return True
+        self.request = request
         self.execute_request_handler()
+        return True
 
     def execute_request_handler(self):
         """
@@ -374,15 +575,20 @@ class HttpProtocol(asyncio.Protocol):
 
         :return: None
         """
-        self._response_timeout_handler = self.loop.call_later(
+        self._response_timeout_handler = self.timers.call_later(
             self.response_timeout, self.response_timeout_callback
         )
         self._last_request_time = current_time
+        request = self.request
         self._request_handler_task = self.loop.create_task(
             self.request_handler(
-                self.request, self.write_response, self.stream_response
+                request, self.write_response, self.stream_response
             )
         )
+        # the response is written by the handler task, a spilled body
+        # is done with once the task is, however it ends
+        self._request_handler_task.add_done_callback(
+            lambda task: request.body_close())
 
     # -------------------------------------------- #
     # Responding
@@ -403,7 +609,7 @@ class HttpProtocol(asyncio.Protocol):
             extra = {"status": getattr(response, "status", 0)}
 
             if isinstance(response, HTTPResponse):
-                extra["byte"] = len(response.body)
+                extra["byte"] = body_length(response.body)
             else:
                 extra["byte"] = -1
 
@@ -416,11 +622,15 @@ class HttpProtocol(asyncio.Protocol):
             self._response_timeout_handler = None
         try:
             keep_alive = self.keep_alive
-            self.transport.write(
-                response.output(
-                    self.request.version, keep_alive, self.keep_alive_timeout
-                )
+            parts = response.output_parts(
+                self.request.version, keep_alive, self.keep_alive_timeout
             )
+            if VECTORED_WRITES and len(parts) > 1:
+                # head and body go out in a single sendmsg() call
+                self.transport.writelines(parts)
+            else:
+                for data in parts:
+                    self.transport.write(data)
             self.log_response(response)
         except AttributeError:
             logger.error(
@@ -446,10 +656,12 @@ class HttpProtocol(asyncio.Protocol):
                 self.transport = None
             else:
                 self._last_response_time = current_time
-                self._keep_alive_timeout_handler = self.loop.call_later(
-                    self.keep_alive_timeout, self.keep_alive_timeout_callback
-                )
                 self.cleanup()
+                if not self.handle_next():
+                    self._keep_alive_timeout_handler = self.timers.call_later(
+                        self.keep_alive_timeout,
+                        self.keep_alive_timeout_callback
+                    )
 
     async def drain(self):
         await self._not_paused.wait()
@@ -498,10 +710,12 @@ class HttpProtocol(asyncio.Protocol):
                 self.transport = None
             else:
                 self._last_response_time = current_time
-                self._keep_alive_timeout_handler = self.loop.call_later(
-                    self.keep_alive_timeout, self.keep_alive_timeout_callback
-                )
                 self.cleanup()
+                if not self.handle_next():
+                    self._keep_alive_timeout_handler = self.timers.call_later(
+                        self.keep_alive_timeout,
+                        self.keep_alive_timeout_callback
+                    )
 
     def write_error(self, exception):
         # An error _is_ a response.
@@ -511,8 +725,12 @@ class HttpProtocol(asyncio.Protocol):
             self._response_timeout_handler = None
         response = None
         try:
-            response = self.error_handler.response(self.request, exception)
-            version = self.request.version if self.request else "1.1"
+            request = self.request
+            if request is None:
+                # e.g. a request that failed to be parsed
+                request = self._incoming
+            response = self.error_handler.response(request, exception)
+            version = request.version if request else "1.1"
             self.transport.write(response.output(version))
         except RuntimeError:
             if self._debug:
@@ -565,22 +783,23 @@ class HttpProtocol(asyncio.Protocol):
     def cleanup(self):
         """This is called when KeepAlive feature is used,
         it resets the connection in order for it to be able
-        to handle receiving another request on the same connection."""
-        self.parser = None
+        to respond to another request on the same connection.
+        The parser is kept, it may be in the middle of the next request."""
+        request = self.request
         self.request = None
-        self.url = None
-        self.headers = None
         self._request_handler_task = None
-        self._request_stream_task = None
-        self._total_request_size = 0
-        self._is_stream_handler = False
+        if request is not None and request.stream is not None:
+            # chunks of other streams, e.g. of a pipelined request,
+            # stay in the backlog
+            request.stream.discard()
 
     def close_if_idle(self):
         """Close the connection if a request is not being sent or received
 
         :return: boolean - True if closed, false if staying open
         """
-        if not self.parser:
+        if not self._parsing and self.request is None \
+                and not self._pipeline:
             self.transport.close()
             return True
         return False
@@ -15,7 +15,9 @@
 #
 
 import asyncio
+import io
 import logging
+import tempfile
 
 from httptools import parse_url
 
@@ -23,6 +25,9 @@ logger = logging.getLogger(__name__)
 
 
 DEFAULT_HTTP_CONTENT_TYPE = "application/octet-stream"
+# memory preallocated for a body up front, whatever length it declares,
+# the body grows up to its declared length as its bytes arrive
+BODY_PREALLOCATE_SIZE = 4 * 1024 * 1024
 
 
 # HTTP/1.1: https://www.w3.org/Protocols/rfc2616/rfc2616-sec7.html#sec7.2.1
@@ -47,18 +52,119 @@ class RequestParameters(dict):
 class StreamBuffer(object):
     def __init__(self, buffer_size=100):
         self._queue = asyncio.Queue(buffer_size)
+        self._eof = False
+        self._discarded = False
 
     async def read(self):
         """ Stop reading when gets None """
+        if self._eof:
+            return None
         payload = await self._queue.get()
         self._queue.task_done()
+        if payload is None:
+            self._eof = True
+        return payload
+
+    async def readall(self):
+        """Reads the rest of the stream"""
+        return b"".join([chunk async for chunk in self])
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        payload = await self.read()
+        if payload is None:
+            raise StopAsyncIteration
         return payload
 
     async def put(self, payload):
-        await self._queue.put(payload)
+        if not self._discarded:
+            await self._queue.put(payload)
+
+    def put_nowait(self, payload):
+        if not self._discarded:
+            self._queue.put_nowait(payload)
 
     def is_full(self):
-        return self._queue.full()
+        return not self._discarded and self._queue.full()
+
+    def discard(self):
+        """Drops chunks nobody is going to read, e.g. the rest of a body
+        its handler responded to without reading, a put() waiting
+        for room returns and chunks put afterwards are dropped"""
+        self._discarded = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
+class BodyReader(io.BufferedIOBase):
+    """Reads a request body in place, without copying it into a BytesIO.
+    getvalue() and getbuffer() return the body itself.
+    """
+
+    def __init__(self, body):
+        super().__init__()
+        self._body = body
+        self._view = memoryview(body)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        self._checkClosed()
+        end = len(self._body)
+        if size is not None and size >= 0:
+            end = min(end, self._pos + size)
+        data = bytes(self._view[self._pos:end])
+        self._pos = max(self._pos, end)
+        return data
+
+    read1 = read
+
+    def readinto(self, b):
+        self._checkClosed()
+        with memoryview(b) as view, view.cast("B") as target:
+            n = min(len(target), len(self._body) - self._pos)
+            if n <= 0:
+                return 0
+            target[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    readinto1 = readinto
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        self._checkClosed()
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self._body)
+        if pos < 0:
+            raise ValueError("negative seek position {0}".format(pos))
+        self._pos = pos
+        return pos
+
+    def tell(self):
+        self._checkClosed()
+        return self._pos
+
+    def getvalue(self):
+        self._checkClosed()
+        return self._body
+
+    def getbuffer(self):
+        self._checkClosed()
+        return memoryview(self._body)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
 
 
 class Request(dict):
@@ -66,7 +172,11 @@ class Request(dict):
 
     __slots__ = (
         "__weakref__",
+        "_body_length",
+        "_body_size",
+        "_body_view",
         "_cookies",
+        "_disconnect_callbacks",
         "_ip",
         "_parsed_url",
         "_port",
@@ -76,6 +186,7 @@ class Request(dict):
         "body",
         "endpoint",
         "headers",
+        "keep_alive",
         "method",
         "parsed_args",
         "parsed_files",
@@ -95,6 +206,7 @@ class Request(dict):
         self.app = None
 
         self.headers = headers
+        self.keep_alive = True
         self.version = version
         self.method = method
         self.transport = transport
@@ -109,6 +221,7 @@ class Request(dict):
         self._cookies = None
         self.stream = None
         self.endpoint = None
+        self._disconnect_callbacks = []
 
     def __repr__(self):
         if self.method is None or not self.path:
@@ -124,12 +237,124 @@ class Request(dict):
 
     def body_init(self):
         self.body = []
+        self._body_view = None
+        self._body_size = 0
+        self._body_length = 0
+
+    @property
+    def body_size(self):
+        """Number of body bytes received so far"""
+        return self._body_size
+
+    def body_allocate(self, length):
+        """Preallocates a body of a known length, up to
+        BODY_PREALLOCATE_SIZE at first,
+        chunks are written to it in place instead of being joined.
 
-    def body_push(self, data):
-        self.body.append(data)
+        :param length: body length, i.e. Content-Length
+        """
+        self._body_length = length
+        self.body = bytearray(min(length, BODY_PREALLOCATE_SIZE))
+        self._body_view = memoryview(self.body)
+
+    def body_grow(self, size):
+        """Grows a preallocated body to hold at least size bytes,
+        doubling it, but not past its declared length.
+
+        :param size: number of bytes to make room for
+        :return: False if the body is at its declared length already
+        """
+        allocated = len(self.body)
+        if allocated >= self._body_length:
+            return False
+        body = bytearray(
+            min(self._body_length, max(size, allocated * 2)))
+        body[:self._body_size] = self._body_view[:self._body_size]
+        self._body_view.release()
+        self.body = body
+        self._body_view = memoryview(body)
+        return True
+
+    def body_spill(self):
+        """Moves the body to an anonymous temporary file, chunks are
+        written to it as they arrive instead of being kept in memory.
+        Does nothing if the body is in a file or preallocated already.
+        """
+        if not isinstance(self.body, list):
+            return
+        spill = tempfile.TemporaryFile(buffering=0)
+        try:
+            for chunk in self.body:
+                spill.write(chunk)
+        except BaseException:
+            spill.close()
+            raise
+        self.body = spill
+
+    def body_buffer(self, size):
+        """Returns the free part of a preallocated body, up to size bytes,
+        for the socket to be read into.
+
+        :param size: maximum buffer size
+        :return: writable buffer or None if there is no room
+        """
+        if self._body_view is None:
+            return None
+        if self._body_size >= len(self.body) and \
+                not self.body_grow(self._body_size + size):
+            return None
+        return self._body_view[self._body_size:self._body_size + size]
+
+    def body_push(self, data, in_place=False):
+        """Adds a body chunk.
+
+        :param data: body chunk
+        :param in_place: the chunk was read into body_buffer() already
+        """
+        end = self._body_size + len(data)
+        if self._body_view is not None:
+            if not in_place:
+                if end > len(self.body):
+                    self.body_grow(end)
+                self._body_view[self._body_size:end] = data
+        elif isinstance(self.body, list):
+            self.body.append(data)
+        else:
+            self.body.write(data)
+        self._body_size = end
 
     def body_finish(self):
-        self.body = b"".join(self.body)
+        if self._body_view is not None:
+            self._body_view.release()
+            self._body_view = None
+        elif isinstance(self.body, list):
+            self.body = b"".join(self.body)
+        else:
+            self.body.seek(0)
+            self.body = io.BufferedReader(self.body)
+
+    def body_close(self):
+        """Closes a body spilled to a temporary file,
+        its disk space is freed once it is closed."""
+        if isinstance(self.body, io.IOBase):
+            self.body.close()
+
+    def on_disconnect(self, callback):
+        """Registers a callback to be called if the connection
+        gets lost before the response is written.
+
+        :param callback: callable with no arguments
+        """
+        self._disconnect_callbacks.append(callback)
+
+    def disconnected(self):
+        callbacks, self._disconnect_callbacks = (
+            self._disconnect_callbacks, [])
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("disconnect callback failed")
 
     @property
     def token(self):
@@ -14,7 +14,9 @@
 # limitations under the License.
 #
 
-from functools import partial
+import os
+
+from functools import lru_cache, partial
 from urllib.parse import quote_plus
 
 from .exceptions import (
@@ -23,9 +25,139 @@ from .exceptions import (
 
 from json import dumps
 
+from fdk import constants
+from fdk.headers import Headers
+
 
 json_dumps = partial(dumps, separators=(",", ":"))
 
+# bodies up to this size are sent along with headers in a single write,
+# larger ones are not joined with the headers, the transport copies
+# only the part the socket does not take right away
+SMALL_BODY_SIZE = 16384
+FILE_CHUNK_SIZE = 65536
+# values of the lines encoded once, every response carries
+# fn-fdk-version and fn-fdk-runtime and most share a content type,
+# per-request lines, e.g. fn-call-id, are encoded every time
+CACHED_CONTENT_TYPES = (
+    "text/plain",
+    "application/json",
+    "application/json; charset=utf-8",
+    "application/octet-stream",
+)
+KEEP_ALIVE = b"Connection: keep-alive\r\n"
+CLOSE = b"Connection: close\r\n"
+
+
+def body_length(body):
+    if isinstance(body, memoryview):
+        return body.nbytes
+    return len(body)
+
+
+def byte_view(body):
+    """
+    Casts a memoryview of items other than bytes, e.g. of array("i"),
+    to a view of bytes, transports slice what is left to send
+    after a partial write by items
+    :param body: response body
+    :type body: bytes or memoryview
+    :return: response body
+    :rtype: bytes or memoryview
+    """
+    if not isinstance(body, memoryview) or (
+            body.format == "B" and body.ndim == 1):
+        return body
+    if body.c_contiguous:
+        return body.cast("B")
+    return memoryview(body.tobytes())
+
+
+@lru_cache(maxsize=128)
+def status_line(version, status):
+    """
+    Encodes a response status line
+    :param version: HTTP version
+    :type version: str
+    :param status: status code
+    :type status: int
+    :return: status line, CRLF included
+    :rtype: bytes
+    """
+    return b"HTTP/%b %d %b\r\n" % (
+        version.encode(),
+        status,
+        STATUS_CODES.get(status, b"UNKNOWN RESPONSE"),
+    )
+
+
+def header_line(name, value):
+    """
+    Encodes a header line
+    :param name: header name
+    :type name: str
+    :param value: header value
+    :type value: object
+    :return: header line, CRLF included
+    :rtype: bytes
+    """
+    if type(name) is not str:
+        name = str(name)
+    if type(value) is int:
+        # Content-Length, no str() round trip
+        return b"%b: %d\r\n" % (name.encode(), value)
+    if type(value) is not str:
+        value = str(value)
+    return b"%b: %b\r\n" % (name.encode(), value.encode("utf-8"))
+
+
+def header_lines(headers):
+    """
+    Encodes a header block, lines of the FDK's own headers are cached,
+    a field with a list of values goes out as a line per value
+    :param headers: response headers
+    :type headers: fdk.headers.Headers
+    :return: header lines, CRLF included
+    :rtype: list
+    """
+    cache = _header_cache
+    lines = []
+    for item in headers.items():
+        if isinstance(item[1], list):
+            lines.extend(header_line(item[0], v) for v in item[1])
+            continue
+        try:
+            line = cache.get(item)
+        except TypeError:
+            # unhashable value
+            line = None
+        if line is None:
+            line = header_line(*item)
+        lines.append(line)
+    return lines
+
+
+_header_cache = {
+    item: header_line(*item) for item in [
+        *constants.FDK_RESPONSE_HEADERS.items(),
+        *((constants.CONTENT_TYPE, v) for v in CACHED_CONTENT_TYPES),
+        ("transfer-encoding", "chunked"),
+    ]
+}
+
+
+def as_headers(headers):
+    """
+    Wraps response headers, Headers are taken as they are
+    :param headers: response headers
+    :type headers: dict
+    :return: response headers
+    :rtype: fdk.headers.Headers
+    """
+    if isinstance(headers, Headers):
+        return headers
+    return Headers(headers)
+
 
 class BaseHTTPResponse(object):
 
@@ -38,20 +170,7 @@ class BaseHTTPResponse(object):
             return str(data).encode()
 
     def _parse_headers(self):
-        headers = b""
-        for name, value in self.headers.items():
-            try:
-                headers += b"%b: %b\r\n" % (
-                    name.encode(),
-                    value.encode("utf-8"),
-                )
-            except AttributeError:
-                headers += b"%b: %b\r\n" % (
-                    str(name).encode(),
-                    str(value).encode("utf-8"),
-                )
-
-        return headers
+        return b"".join(header_lines(self.headers))
 
 
 class StreamingHTTPResponse(BaseHTTPResponse):
@@ -70,7 +189,7 @@ class StreamingHTTPResponse(BaseHTTPResponse):
         self.content_type = content_type
         self.streaming_fn = streaming_fn
         self.status = status
-        self.headers = dict(headers or {})
+        self.headers = as_headers(headers)
         self._cookies = None
 
     async def write(self, data):
@@ -78,8 +197,9 @@ class StreamingHTTPResponse(BaseHTTPResponse):
 
         :param data: bytes-ish data to be written.
         """
-        if type(data) is not bytes:
+        if not isinstance(data, (bytes, bytearray, memoryview)):
             data = self._encode_body(data)
+        data = byte_view(data)
 
         self.protocol.push_data(b"%x\r\n%b\r\n" % (len(data), data))
         await self.protocol.drain()
@@ -113,75 +233,14 @@ class StreamingHTTPResponse(BaseHTTPResponse):
 
         self.headers["Transfer-Encoding"] = "chunked"
         self.headers.pop("Content-Length", None)
-        self.headers["Content-Type"] = self.headers.get(
-            "Content-Type", self.content_type
-        )
+        self.headers.setdefault("Content-Type", self.content_type)
 
-        headers = self._parse_headers()
-
-        if self.status == 200:
-            status = b"OK"
-        else:
-            status = STATUS_CODES.get(self.status)
-
-        return (b"HTTP/%b %d %b\r\n" b"%b" b"%b\r\n") % (
-            version.encode(),
-            self.status,
-            status,
+        return b"".join((
+            status_line(version, self.status),
             timeout_header,
-            headers,
-        )
-
-
-# CaseInsensitiveDict for headers. TODO should we let users use it in fdk too?
-class CaseInsensitiveDict(dict):
-    @classmethod
-    def _k(cls, key):
-        return key.lower() if isinstance(key, str) else key
-
-    def __init__(self, *args, **kwargs):
-        super(CaseInsensitiveDict, self).__init__(*args, **kwargs)
-        self._convert_keys()
-
-    def __getitem__(self, key):
-        return super(CaseInsensitiveDict, self).__getitem__(
-            self.__class__._k(key))
-
-    def __setitem__(self, key, value):
-        super(CaseInsensitiveDict, self).__setitem__(
-            self.__class__._k(key), value)
-
-    def __delitem__(self, key):
-        return super(CaseInsensitiveDict, self).__delitem__(
-            self.__class__._k(key))
-
-    def __contains__(self, key):
-        return super(CaseInsensitiveDict, self).__contains__(
-            self.__class__._k(key))
-
-    # DEPRECATED
-    # def has_key(self, key):
-
-    def pop(self, key, *args, **kwargs):
-        return super(CaseInsensitiveDict, self).pop(
-            self.__class__._k(key), *args, **kwargs)
-
-    def get(self, key, *args, **kwargs):
-        return super(CaseInsensitiveDict, self).get(
-            self.__class__._k(key), *args, **kwargs)
-
-    def setdefault(self, key, *args, **kwargs):
-        return super(CaseInsensitiveDict, self).setdefault(
-            self.__class__._k(key), *args, **kwargs)
-
-    def update(self, E={}, **F):
-        super(CaseInsensitiveDict, self).update(self.__class__(E))
-        super(CaseInsensitiveDict, self).update(self.__class__(**F))
-
-    def _convert_keys(self):
-        for k in list(self.keys()):
-            v = super(CaseInsensitiveDict, self).pop(k)
-            self.__setitem__(k, v)
+            self._parse_headers(),
+            b"\r\n",
+        ))
 
 
 class HTTPResponse(BaseHTTPResponse):
@@ -200,51 +259,119 @@ class HTTPResponse(BaseHTTPResponse):
         if body is not None:
             self.body = self._encode_body(body)
         else:
-            self.body = body_bytes
+            self.body = byte_view(body_bytes)
 
         self.status = status
-        self.headers = CaseInsensitiveDict(headers or {})
+        self.headers = as_headers(headers)
         self._cookies = None
 
     def output(self, version="1.1", keep_alive=False, keep_alive_timeout=None):
-        # This is all returned in a kind-of funky way
-        # We tried to make this as fast as possible in pure python
-        timeout_header = b""
-        if keep_alive and keep_alive_timeout is not None:
-            timeout_header = b"Keep-Alive: %d\r\n" % keep_alive_timeout
+        return b"".join(
+            self.output_parts(version, keep_alive, keep_alive_timeout))
 
+    def output_parts(
+        self, version="1.1", keep_alive=False, keep_alive_timeout=None
+    ):
+        """Returns buffers to write to the transport: a head and a body,
+        small bodies are joined with the head.
+        """
         body = b""
         if has_message_body(self.status):
             body = self.body
             self.headers["Content-Length"] = self.headers.get(
-                "Content-Length", len(self.body)
+                "Content-Length", body_length(self.body)
             )
 
-        self.headers["Content-Type"] = self.headers.get(
-            "Content-Type", self.content_type
-        )
+        head = self.output_head(version, keep_alive, keep_alive_timeout)
+        if not body:
+            return (head,)
+        if body_length(body) <= SMALL_BODY_SIZE:
+            return (head + body,)
+        return head, body
 
-        if self.status in (304, 412):
-            self.headers = remove_entity_headers(self.headers)
+    def output_head(
+        self, version="1.1", keep_alive=False, keep_alive_timeout=None
+    ):
+        # This is all returned in a kind-of funky way
+        # We tried to make this as fast as possible in pure python
+        timeout_header = b""
+        if keep_alive and keep_alive_timeout is not None:
+            timeout_header = b"Keep-Alive: %d\r\n" % keep_alive_timeout
 
-        headers = self._parse_headers()
+        self.headers.setdefault("Content-Type", self.content_type)
 
-        if self.status == 200:
-            status = b"OK"
-        else:
-            status = STATUS_CODES.get(self.status, b"UNKNOWN RESPONSE")
-
-        return (
-            b"HTTP/%b %d %b\r\n" b"Connection: %b\r\n" b"%b" b"%b\r\n" b"%b"
-        ) % (
-            version.encode(),
-            self.status,
-            status,
-            b"keep-alive" if keep_alive else b"close",
+        if self.status in (304, 412):
+            self.headers = as_headers(remove_entity_headers(self.headers))
+
+        return b"".join((
+            status_line(version, self.status),
+            KEEP_ALIVE if keep_alive else CLOSE,
             timeout_header,
-            headers,
-            body,
+            self._parse_headers(),
+            b"\r\n",
+        ))
+
+
+class FileHTTPResponse(HTTPResponse):
+    __slots__ = ("file", "offset", "count", "protocol")
+
+    def __init__(
+        self,
+        file,
+        status=200,
+        headers=None,
+        content_type="application/octet-stream",
+        offset=None,
+        count=None,
+    ):
+        """Sends a file with loop.sendfile, the file is closed once sent.
+
+        :param file: regular file opened in binary mode
+        :param offset: where to start reading the file,
+            current file position by default
+        :param count: number of bytes to send, up to the end of file
+            by default
+        """
+        super().__init__(
+            status=status, headers=headers, content_type=content_type
         )
+        self.file = file
+        self.offset = file.tell() if offset is None else offset
+        if count is None:
+            count = os.fstat(file.fileno()).st_size - self.offset
+        self.count = max(count, 0)
+        self.protocol = None
+
+    async def stream(
+        self, version="1.1", keep_alive=False, keep_alive_timeout=None
+    ):
+        try:
+            if has_message_body(self.status):
+                self.headers["Content-Length"] = self.count
+            self.protocol.push_data(
+                self.output_head(version, keep_alive, keep_alive_timeout))
+            if self.count > 0 and has_message_body(self.status):
+                await self.send_file()
+        finally:
+            self.file.close()
+
+    async def send_file(self):
+        loop = self.protocol.loop
+        try:
+            await loop.sendfile(
+                self.protocol.transport, self.file, self.offset, self.count)
+        except NotImplementedError:
+            # the event loop (i.e. uvloop) has no sendfile support
+            self.file.seek(self.offset)
+            left = self.count
+            while left > 0:
+                chunk = await loop.run_in_executor(
+                    None, self.file.read, min(left, FILE_CHUNK_SIZE))
+                if not chunk:
+                    break
+                left -= len(chunk)
+                self.protocol.push_data(chunk)
+                await self.protocol.drain()
 
 
 def json(
@@ -22,7 +22,7 @@ from functools import lru_cache
 
 ROUTER_CACHE_SIZE = 1024
 Route = namedtuple(
-    "Route", ["handler", "methods", "path"]
+    "Route", ["handler", "methods", "path", "stream"]
 )
 
 
@@ -31,9 +31,28 @@ class Router(object):
     def __init__(self):
         self.__router_map = {}
 
-    def add(self, path, methods, handler):
+    def add(self, path, methods, handler, stream=False):
+        """
+        Registers a route
+        :param path: request path
+        :param methods: allowed request methods
+        :param handler: request handler
+        :param stream: whether a handler gets request body as a stream
+            (request.stream) instead of fully buffered request.body,
+            or a callable that tells it once a request arrives
+        """
         self.__router_map[path] = Route(
-            handler=handler, methods=methods, path=path)
+            handler=handler, methods=methods, path=path, stream=stream)
+
+    @property
+    def is_request_stream(self):
+        return any(rt.stream for rt in self.__router_map.values())
+
+    def is_stream_handler(self, request):
+        rt = self.__router_map.get(request.path)
+        if rt is None or not rt.stream:
+            return False
+        return rt.stream() if callable(rt.stream) else True
 
     @lru_cache(maxsize=ROUTER_CACHE_SIZE)
     def get(self, request_path, request_method):
@@ -25,7 +25,9 @@ from functools import partial
 from signal import SIG_IGN, SIGINT, SIGTERM
 from signal import signal as signal_func
 
+from . import protocol as http_protocol
 from .protocol import HttpProtocol
+from .timer import TimerWheel
 
 from fdk import constants
 
@@ -37,16 +39,20 @@ class Signal(object):
 logger = logging.getLogger(__name__)
 
 
-def update_current_time(loop):
+def update_current_time(loop, timers=None):
     """Cache the current time, since it is needed at the end of every
-    keep-alive request to update the request timeout time
+    keep-alive request to update the request timeout time,
+    and advance the connection timer wheel
 
     :param loop:
+    :param timers: connection timer wheel
     :return:
     """
-    global current_time
-    current_time = time()
-    loop.call_later(1, partial(update_current_time, loop))
+    # protocols read the time from their own module
+    http_protocol.current_time = time()
+    if timers is not None:
+        timers.tick()
+    loop.call_later(1, partial(update_current_time, loop, timers))
 
 
 def trigger_events(events, loop):
@@ -70,7 +76,8 @@ def serve(
     keep_alive_timeout=75,
     ssl=None,
     sock=None,
-    request_max_size=100000000,
+    request_max_size=constants.DEFAULT_REQUEST_MAX_SIZE,
+    request_spill_size=None,
     reuse_port=False,
     loop=None,
     protocol=HttpProtocol,
@@ -90,6 +97,8 @@ def serve(
     websocket_read_limit=2 ** 16,
     websocket_write_limit=2 ** 16,
     state=None,
+    before_start=None,
+    after_stop=None,
 ):
     """Start asynchronous HTTP Server on an individual process.
 
@@ -102,6 +111,9 @@ def serve(
     :param ssl: SSLContext
     :param sock: Socket for the server to accept connections from
     :param request_max_size: size in bytes, `None` for no limit
+    :param request_spill_size: size in bytes above which request bodies
+                               are written to a temporary file,
+                               `None` keeps them in memory
     :param reuse_port: `True` for multiple workers
     :param loop: asyncio compatible event loop
     :param protocol: subclass of asyncio protocol class
@@ -118,6 +130,8 @@ def serve(
                                   outgoing bytes, the low-water limit is a
                                   quarter of the high-water limit.
     :param is_request_stream: disable/enable Request.stream
+    :param before_start: functions to execute before the server starts
+    :param after_stop: functions to execute after the server stops
     :return: Nothing
     """
     if not run_async:
@@ -128,7 +142,10 @@ def serve(
     if debug:
         loop.set_debug(debug)
 
+    trigger_events(before_start or [], loop)
+
     connections = connections if connections is not None else set()
+    timers = TimerWheel()
     server = partial(
         protocol,
         loop=loop,
@@ -140,6 +157,7 @@ def serve(
         response_timeout=response_timeout,
         keep_alive_timeout=keep_alive_timeout,
         request_max_size=request_max_size,
+        request_spill_size=request_spill_size,
         request_class=request_class,
         access_log=access_log,
         keep_alive=keep_alive,
@@ -151,6 +169,7 @@ def serve(
         websocket_write_limit=websocket_write_limit,
         state=state,
         debug=debug,
+        timers=timers,
     )
 
     create_server_kwargs = dict(
@@ -170,8 +189,8 @@ def serve(
     )
 
     # Instead of pulling time at the end of every request,
-    # pull it once per minute
-    loop.call_soon(partial(update_current_time, loop))
+    # pull it once per second
+    loop.call_soon(partial(update_current_time, loop, timers))
 
     if run_async:
         return server_coroutine
@@ -213,7 +232,10 @@ def serve(
         finally:
             http_server.close()
             loop.run_until_complete(http_server.wait_closed())
-            loop.run_until_complete(loop.shutdown_asyncgens())
-            loop.close()
+            try:
+                trigger_events(after_stop or [], loop)
+            finally:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
 
     return start_serving, start
@@ -0,0 +1,101 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WHEEL_SIZE = 128
+
+
+class TimerHandle(object):
+    __slots__ = ("_slot", "deadline", "callback", "args")
+
+    def __init__(self, slot, deadline, callback, args):
+        self._slot = slot
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        """Removes the timer from its wheel slot"""
+        if self._slot is not None:
+            self._slot.pop(self, None)
+            self._slot = None
+        self.callback = None
+        self.args = None
+
+    def cancelled(self):
+        return self.callback is None
+
+
+class TimerWheel(object):
+    """Hashed timer wheel for connection timeouts.
+
+    Timers go into one of `size` slots by the tick they are due at,
+    scheduling and cancelling them is O(1) and does not touch the event
+    loop's scheduler heap. The wheel is advanced by calling tick() once
+    per `resolution` seconds, timers fire up to one tick late,
+    never early.
+    """
+
+    def __init__(self, size=DEFAULT_WHEEL_SIZE, resolution=1):
+        self._slots = [{} for _ in range(size)]
+        self._resolution = resolution
+        self._tick = 0
+
+    def call_later(self, delay, callback, *args):
+        """Schedules a callback, same as loop.call_later()
+
+        :param delay: number of seconds to wait for
+        :param callback: callable
+        :return: handle with cancel()
+        """
+        # the current tick is partly gone already
+        ticks = max(0, math.ceil(delay / self._resolution)) + 1
+        deadline = self._tick + ticks
+        slot = self._slots[deadline % len(self._slots)]
+        handle = TimerHandle(slot, deadline, callback, args)
+        slot[handle] = None
+        return handle
+
+    def tick(self):
+        """Advances the wheel by one tick and runs the timers due
+
+        :return: None
+        """
+        self._tick += 1
+        slot = self._slots[self._tick % len(self._slots)]
+        # timers more than a full turn away stay in the slot
+        due = [h for h in slot if h.deadline <= self._tick]
+        for handle in due:
+            del slot[handle]
+            handle._slot = None
+        for handle in due:
+            callback, args = handle.callback, handle.args
+            if callback is None:
+                # cancelled by a timer that fired before
+                continue
+            handle.callback = handle.args = None
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("timer callback %r failed", callback)
+
+    def __len__(self):
+        return sum(len(slot) for slot in self._slots)
@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import os
 import sys
 from fdk import version
 
@@ -34,7 +35,43 @@ FN_APP_NAME = "FN_APP_NAME"
 FN_NAME = "FN_FN_NAME"
 OCI_TRACE_COLLECTOR_URL = "OCI_TRACE_COLLECTOR_URL"
 OCI_TRACING_ENABLED = "OCI_TRACING_ENABLED"
+FDK_SYNC_EXECUTOR = "FDK_SYNC_EXECUTOR"
+FDK_SYNC_EXECUTOR_POOL_SIZE = "FDK_SYNC_EXECUTOR_POOL_SIZE"
+FDK_MAX_CONCURRENCY = "FDK_MAX_CONCURRENCY"
+FDK_MAX_QUEUE = "FDK_MAX_QUEUE"
+FDK_WORKERS = "FDK_WORKERS"
+FDK_REQUEST_STREAM = "FDK_REQUEST_STREAM"
+FDK_EAGER_LOAD = "FDK_EAGER_LOAD"
+FDK_STARTUP_TRACE = "FDK_STARTUP_TRACE"
+FDK_ZYGOTE = "FDK_ZYGOTE"
+FDK_REQUEST_SPILL_SIZE = "FDK_REQUEST_SPILL_SIZE"
+FDK_REQUEST_MAX_SIZE = "FDK_REQUEST_MAX_SIZE"
 
+# optional function module hook run by an eager load
+WARMUP_ENTRYPOINT = "warmup"
+# optional function module lifespan hooks
+STARTUP_ENTRYPOINT = "on_startup"
+SHUTDOWN_ENTRYPOINT = "on_shutdown"
+
+# sync handler execution modes
+SYNC_EXECUTOR_INLINE = "inline"
+SYNC_EXECUTOR_THREAD = "thread"
+SYNC_EXECUTOR_PROCESS = "process"
+DEFAULT_SYNC_EXECUTOR_POOL_SIZE = 4
+
+# admission control
+DEFAULT_MAX_QUEUE = 0
+SERVICE_TIME_EWMA_ALPHA = 0.2
+
+# multi-process listener
+WORKER_RESTART_DELAY = 1
+LISTEN_BACKLOG = 100
+
+# requests over it are rejected with 413, headers included
+DEFAULT_REQUEST_MAX_SIZE = 100000000
+
+
+TRUTHY_VALUES = ['true', '1', 't', 'y', 'yes']
 
 # headers are lower case TODO(denis): why?
 FN_INTENT = "fn-intent"
@@ -61,9 +98,39 @@ VERSION_HEADER_VALUE = "fdk-python/" + version.VERSION
 RUNTIME_HEADER_VALUE = "python/{}.{}.{} {}".format(
     sys.version_info.major, sys.version_info.minor, sys.version_info.micro,
     sys.version_info.releaselevel)
+FDK_RESPONSE_HEADERS = {
+    FN_FDK_VERSION: VERSION_HEADER_VALUE,
+    FN_FDK_RUNTIME: RUNTIME_HEADER_VALUE,
+}
 
 
 # todo: python 3.8 is on its way, make more flexible
 def is_py37():
     py_version = sys.version_info
     return (py_version.major, py_version.minor) == (3, 7)
+
+
+def int_env(name, default=None, minimum=0):
+    """
+    Reads an integer setting from the environment
+    :param name: environment variable name
+    :type name: str
+    :param default: value of a setting that is not set or empty
+    :param minimum: smallest value allowed
+    :type minimum: int
+    :return: setting value
+    :rtype: int
+    :raises ValueError: if the value is not an integer or is too small
+    """
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError("{0} must be an integer, got: {1}".format(
+            name, value))
+    if value < minimum:
+        raise ValueError("{0} must be at least {1}, got: {2}".format(
+            name, minimum, value))
+    return value
@@ -16,13 +16,21 @@
 
 import datetime as dt
 import io
+import iso8601
 import os
 import random
+import threading
 from fdk import constants
 from fdk import headers as hs
 from fdk import log
 from collections import namedtuple
 
+# built once, creating a namedtuple class per request is expensive
+ZipkinAttrs = namedtuple(
+    "ZipkinAttrs",
+    "trace_id, span_id, parent_span_id, is_sampled, flags"
+)
+
 
 class InvokeContext(object):
 
@@ -31,7 +39,7 @@ class InvokeContext(object):
                  deadline=None, config=None,
                  headers=None, request_url=None,
                  method="POST", fn_format=None,
-                 tracing_context=None):
+                 tracing_context=None, state=None):
         """
         Request context here to be a placeholder
         for request-specific attributes
@@ -61,29 +69,40 @@ class InvokeContext(object):
         :type fn_format: str
         :param tracing_context: tracing context
         :type tracing_context: TracingContext
+        :param state: state shared across invocations
+        :type state: types.SimpleNamespace
         """
         self.__app_id = app_id
         self.__fn_id = fn_id
         self.__call_id = call_id
         self.__config = config if config else {}
-        self.__headers = headers if headers else {}
-        self.__http_headers = {}
+        self.__headers = (headers if isinstance(headers, hs.Headers)
+                          else hs.Headers(headers))
         self.__deadline = deadline
         self.__content_type = content_type
         self._request_url = request_url
         self._method = method
-        self.__response_headers = {}
+        self.__response_headers = hs.Headers()
         self.__fn_format = fn_format
         self.__app_name = app_name
         self.__fn_name = fn_name
         self.__tracing_context = tracing_context if tracing_context else None
-
-        log.log("request headers. gateway: {0} {1}"
-                .format(self.__is_gateway(), headers))
-
-        if self.__is_gateway():
-            self.__headers = hs.decap_headers(headers, True)
-            self.__http_headers = hs.decap_headers(headers, False)
+        self.__state = state
+        self.__cancelled = threading.Event()
+        self.__cancel_lock = threading.Lock()
+        self.__cancel_callbacks = []
+
+        self.__gateway = self.__is_gateway()
+        if log.enabled():
+            # headers are only formatted for debug logs
+            log.log("request headers. gateway: {0} {1}"
+                    .format(self.__gateway, headers))
+
+        if self.__gateway:
+            self.__headers, self.__http_headers = hs.decap_gateway_headers(
+                headers)
+        else:
+            self.__http_headers = hs.Headers()
 
     def AppID(self):
         return self.__app_id
@@ -115,6 +134,9 @@ class InvokeContext(object):
     def TracingContext(self):
         return self.__tracing_context
 
+    def State(self):
+        return self.__state
+
     def Deadline(self):
         if self.__deadline is None:
             now = dt.datetime.now(dt.timezone.utc).astimezone()
@@ -122,13 +144,63 @@ class InvokeContext(object):
             return now.isoformat()
         return self.__deadline
 
+    def Cancel(self):
+        """
+        Marks an invocation as cancelled, i.e., its deadline has passed
+        or the caller went away, so nobody waits for the result any longer
+        :return: None
+        """
+        with self.__cancel_lock:
+            if self.__cancelled.is_set():
+                return
+            self.__cancelled.set()
+            callbacks, self.__cancel_callbacks = self.__cancel_callbacks, []
+
+        for callback in callbacks:
+            self.__run_cancel_callback(callback)
+
+    def Cancelled(self):
+        """
+        Checks whether an invocation was cancelled,
+        long-running synchronous code should check it
+        periodically and stop doing work once it is set
+        :return: cancellation flag
+        :rtype: bool
+        """
+        return self.__cancelled.is_set()
+
+    def OnCancel(self, callback):
+        """
+        Registers a callback to be called once an invocation
+        gets cancelled. Callbacks run on the FDK's event loop thread,
+        or right away on the caller's thread if already cancelled
+        :param callback: callable with no arguments
+        :type callback: callable
+        :return: None
+        """
+        with self.__cancel_lock:
+            if not self.__cancelled.is_set():
+                self.__cancel_callbacks.append(callback)
+                return
+
+        self.__run_cancel_callback(callback)
+
+    def __run_cancel_callback(self, callback):
+        try:
+            callback()
+        except Exception as ex:
+            log.log("cancellation callback failed: {0}".format(ex))
+
     def SetResponseHeaders(self, headers, status_code):
-        log.log("setting headers. gateway: {0}".format(self.__is_gateway()))
-        if self.__is_gateway():
-            headers = hs.encap_headers(headers, status=status_code)
+        log.log("setting headers. gateway: {0}".format(self.__gateway))
+        if self.__gateway:
+            # encapsulated header names are in lower case already
+            self.__response_headers.update(
+                hs.encap_headers(headers, status=status_code))
+            return
 
         for k, v in headers.items():
-            self.__response_headers[k.lower()] = v
+            self.__response_headers[k] = v
 
     def GetResponseHeaders(self):
         return self.__response_headers
@@ -208,11 +280,6 @@ class TracingContext(object):
 
     # this is a helper method specific for py_zipkin
     def __create_zipkin_attrs(self, is_tracing_enabled):
-        ZipkinAttrs = namedtuple(
-            "ZipkinAttrs",
-            "trace_id, span_id, parent_span_id, is_sampled, flags"
-        )
-
         trace_id = self.__trace_id
         span_id = self.__span_id
         parent_span_id = self.__parent_span_id
@@ -258,6 +325,25 @@ def generate_id():
     return "{:016x}".format(random.getrandbits(64))
 
 
+def time_left(deadline: str) -> float:
+    """
+    Calculates time left before a deadline
+    :param deadline: ISO 8601 deadline, i.e., ctx.Deadline()
+    :type deadline: str
+    :return: number of seconds, negative if the deadline has passed
+    :rtype: float
+    """
+    if deadline is None:
+        return float(constants.DEFAULT_DEADLINE)
+    try:
+        deadline = iso8601.parse_date(deadline)
+    except iso8601.ParseError as ex:
+        log.log("unable to parse deadline {0}: {1}".format(deadline, ex))
+        return float(constants.DEFAULT_DEADLINE)
+    now = dt.datetime.now(dt.timezone.utc)
+    return (deadline - now).total_seconds()
+
+
 def context_from_format(format_def: str, **kwargs) -> (
         InvokeContext, io.BytesIO):
     """
@@ -341,6 +427,7 @@ def context_from_format(format_def: str, **kwargs) -> (
             request_url=request_url,
             fn_format=constants.HTTPSTREAM,
             tracing_context=tracing_context,
+            state=kwargs.get("state"),
         )
 
         return ctx, data
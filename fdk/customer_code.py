@@ -14,12 +14,21 @@
 # limitations under the License.
 #
 
+import asyncio
+import importlib
+import inspect
 import os
+import sys
+import types
 
 from fdk import constants
+from fdk import startup
 
 
-def get_delayed_module_init_class():
+def get_delayed_module_init_class(func_module_path=None):
+    if func_module_path is not None and \
+            func_module_path.endswith((".pyz", ".pyc")):
+        return PackedImport
     if constants.is_py37():
         return Python37DelayedImport
     else:
@@ -83,13 +92,151 @@ class Python37DelayedImport(PythonDelayedImportAbstraction):
         return self._func_module
 
 
+class PackedImport(PythonDelayedImportAbstraction):
+    """
+    Loads a function packed by `fdk pack`: a sourceless .pyc module
+    or a .pyz archive of bytecode named after the function's module
+    """
+
+    def __init__(self, func_module_path):
+        self._func_module = None
+        super(PackedImport, self).__init__(func_module_path)
+
+    def get_module(self):
+        if not self.executed:
+            if self._mod_path.endswith(".pyz"):
+                self._func_module = self.import_from_archive()
+            else:
+                self._func_module = self.import_bytecode()
+            self.executed = True
+
+        return self._func_module
+
+    def import_from_archive(self):
+        name = os.path.splitext(os.path.basename(self._mod_path))[0]
+        # the archive also holds modules the function imports
+        if self._mod_path not in sys.path:
+            sys.path.insert(0, self._mod_path)
+        return importlib.import_module(name)
+
+    def import_bytecode(self):
+        from importlib import machinery
+        from importlib import util
+        loader = machinery.SourcelessFileLoader("func", self._mod_path)
+        spec = util.spec_from_loader("func", loader)
+        func_module = util.module_from_spec(spec)
+        loader.exec_module(func_module)
+        return func_module
+
+
+async def run_hook(hook, state):
+    """
+    Runs customer's lifespan hook, a function or a coroutine function,
+    the hook gets the shared state if it takes an argument
+    :param hook: lifespan hook
+    :type hook: callable
+    :param state: shared state
+    :type state: types.SimpleNamespace
+    :return: None
+    """
+    if hook is None:
+        return
+    if inspect.signature(hook).parameters:
+        result = hook(state)
+    else:
+        result = hook()
+    if inspect.isawaitable(result):
+        await result
+
+
 class Function(object):
 
     def __init__(self, func_module_path, entrypoint="handler"):
-        dm = get_delayed_module_init_class()
+        dm = get_delayed_module_init_class(func_module_path)
         self._delayed_module_class = dm(func_module_path)
         self._entrypoint = entrypoint
+        self._handler = None
+        self._is_coroutine = None
+        self._warmup = None
+        self._on_startup = None
+        self._on_shutdown = None
+        self._started = None
+        # shared across invocations, available as ctx.State()
+        self.state = types.SimpleNamespace()
 
     def handler(self):
-        mod = self._delayed_module_class.get_module()
-        return getattr(mod, self._entrypoint)
+        if self._handler is None:
+            startup.mark("function_import")
+            mod = self._delayed_module_class.get_module()
+            startup.mark("function_imported")
+            self._handler = getattr(mod, self._entrypoint)
+            self._is_coroutine = inspect.iscoroutinefunction(self._handler)
+            self._warmup = getattr(mod, constants.WARMUP_ENTRYPOINT, None)
+            self._on_startup = getattr(
+                mod, constants.STARTUP_ENTRYPOINT, None)
+            self._on_shutdown = getattr(
+                mod, constants.SHUTDOWN_ENTRYPOINT, None)
+        return self._handler
+
+    def is_loaded(self):
+        return self._handler is not None
+
+    def load(self):
+        """
+        Imports customer's module ahead of the first request
+        :return: customer's entrypoint
+        :rtype: callable
+        """
+        return self.handler()
+
+    def warmup(self):
+        """
+        Returns customer's optional warm-up hook, warmup(ctx)
+        :return: warm-up hook or None
+        :rtype: callable
+        """
+        self.handler()
+        return self._warmup
+
+    def is_coroutine(self):
+        """
+        Checks whether customer's entrypoint is a coroutine function,
+        checked once, when the module gets loaded
+        :return: coroutine function flag
+        :rtype: bool
+        """
+        if self._is_coroutine is None:
+            self.handler()
+        return self._is_coroutine
+
+    async def startup(self):
+        """
+        Runs customer's optional on_startup hook once,
+        concurrent callers wait for the same run
+        :return: None
+        """
+        if self._started is None:
+            self.handler()
+            self._started = asyncio.ensure_future(
+                run_hook(self._on_startup, self.state))
+        started = self._started
+        try:
+            await asyncio.shield(started)
+        except BaseException:
+            if started.done() and (started.cancelled()
+                                   or started.exception() is not None):
+                # a failed hook runs again on the next call
+                self._started = None
+            raise
+
+    async def shutdown(self):
+        """
+        Runs customer's optional on_shutdown hook
+        if the on_startup hook has completed
+        :return: None
+        """
+        started, self._started = self._started, None
+        if started is None or not started.done() or started.cancelled():
+            return
+        if started.exception() is None:
+            await run_hook(self._on_shutdown, self.state)
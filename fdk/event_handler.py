@@ -14,14 +14,20 @@
 # limitations under the License.
 #
 
+import asyncio
+import functools
 import io
 import logging
 import os
 import sys
 
+from fdk import admission
 from fdk import constants
+from fdk import context
+from fdk import errors
 from fdk import log
 
+from fdk.async_http import request as http_request
 from fdk.async_http import response
 
 logger = logging.getLogger(__name__)
@@ -30,21 +36,50 @@ fn_logframe_name = os.environ.get(constants.FN_LOGFRAME_NAME)
 fn_logframe_hdr = os.environ.get(constants.FN_LOGFRAME_HDR)
 
 
-def event_handle(handle_code):
+def event_handle(handle_code, limiter=None):
     """
     Performs HTTP request-response procedure
     :param handle_code: customer's code
     :type handle_code: fdk.customer_code.Function
+    :param limiter: admission control
+    :type limiter: fdk.admission.ConcurrencyLimiter
     :return: None
     """
     async def pure_handler(request):
         from fdk import runner
         log.log("in pure_handler")
-        headers = dict(request.headers)
+        # request headers are shared with the invoke context, not copied
+        headers = request.headers
         log_frame_header(headers)
-        func_response = await runner.handle_request(
+        if request.stream is not None:
+            # body chunks are still arriving
+            data = request.stream
+        elif isinstance(request.body, bytearray):
+            # a large body preallocated by the server is read in place
+            data = http_request.BodyReader(request.body)
+        elif isinstance(request.body, io.IOBase):
+            # a large body spilled by the server to a temporary file
+            data = request.body
+        else:
+            data = io.BytesIO(request.body)
+        # the invocation starts only once admitted
+        invoke = functools.partial(
+            runner.handle_request,
             handle_code, constants.HTTPSTREAM,
-            headers=headers, data=io.BytesIO(request.body))
+            headers=headers, data=data,
+            on_disconnect=request.on_disconnect)
+        if limiter is not None:
+            time_left = context.time_left(
+                headers.get(constants.FN_DEADLINE))
+            try:
+                # the slot is held until the response is written,
+                # a streamed one is produced after the function returns
+                await limiter.slot(asyncio.current_task(), time_left)
+            except admission.Rejected as ex:
+                # rejections are produced by the FDK, not the function,
+                # so their status code is not subject to enforcement
+                return reject(headers, ex)
+        func_response = await invoke()
         log.log("request execution completed")
 
         headers = func_response.context().GetResponseHeaders()
@@ -52,6 +87,24 @@ def event_handle(handle_code):
         if status not in constants.FN_ENFORCED_RESPONSE_CODES:
             status = constants.FN_DEFAULT_RESPONSE_CODE
 
+        if func_response.is_streaming():
+            return response.StreamingHTTPResponse(
+                stream_body(func_response),
+                headers=headers,
+                status=status,
+                content_type=headers.get(constants.CONTENT_TYPE,
+                                         "text/plain"),
+            )
+
+        if func_response.is_file():
+            return response.FileHTTPResponse(
+                func_response.file(),
+                headers=headers,
+                status=status,
+                content_type=headers.get(constants.CONTENT_TYPE,
+                                         "application/octet-stream"),
+            )
+
         return response.HTTPResponse(
             headers=headers,
             status=status,
@@ -62,6 +115,69 @@ def event_handle(handle_code):
     return pure_handler
 
 
+def stream_body(func_response):
+    """
+    Writes function's response chunks as they are produced
+    :param func_response: streaming function's response
+    :type func_response: fdk.response.Response
+    :return: streaming callback
+    :rtype: coroutine
+    """
+    async def streaming_fn(http_response):
+        ctx = func_response.context()
+        deadline = ctx.Deadline()
+        chunks = func_response.chunks()
+        try:
+            while True:
+                try:
+                    # the function keeps running while it streams
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), context.time_left(deadline))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    if context.time_left(deadline) > 0:
+                        # raised by customer's code
+                        raise
+                    ctx.Cancel()
+                    log.log("function exceeded its deadline {0}, "
+                            "response stream stopped".format(deadline))
+                    break
+                if ctx.Cancelled():
+                    log.log("caller is gone, response stream stopped")
+                    break
+                # an empty chunk would terminate chunked encoding
+                if len(chunk) > 0:
+                    await http_response.write(chunk)
+        finally:
+            await chunks.aclose()
+
+    return streaming_fn
+
+
+def reject(headers, rejection):
+    """
+    Responds to an invocation that was not admitted
+    :param headers: request headers
+    :type headers: dict
+    :param rejection: rejection
+    :type rejection: fdk.admission.Rejected
+    :return: HTTP response
+    :rtype: fdk.async_http.response.HTTPResponse
+    """
+    ctx, _ = context.context_from_format(
+        constants.HTTPSTREAM, headers=headers, data=None)
+    func_response = errors.DispatchException(
+        ctx, rejection.status, rejection.message).response()
+    headers = ctx.GetResponseHeaders()
+    return response.HTTPResponse(
+        headers=headers,
+        status=func_response.status(),
+        content_type=headers.get(constants.CONTENT_TYPE),
+        body_bytes=func_response.body_bytes(),
+    )
+
+
 def log_frame_header(headers):
     if all((fn_logframe_name, fn_logframe_hdr)):
         frm = fn_logframe_hdr.lower()
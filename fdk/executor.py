@@ -0,0 +1,105 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import contextvars
+import functools
+import os
+
+from concurrent import futures
+
+from fdk import constants
+from fdk import log
+
+
+__executor__ = None
+
+
+def sync_executor_mode():
+    """
+    Returns an execution mode for synchronous handlers
+    :return: one of constants.SYNC_EXECUTOR_* values
+    :rtype: str
+    """
+    mode = os.environ.get(
+        constants.FDK_SYNC_EXECUTOR, constants.SYNC_EXECUTOR_INLINE)
+    return mode.strip().lower()
+
+
+def pool_size():
+    """
+    Returns a number of workers for synchronous handlers
+    :return: pool size
+    :rtype: int
+    """
+    return constants.int_env(
+        constants.FDK_SYNC_EXECUTOR_POOL_SIZE,
+        constants.DEFAULT_SYNC_EXECUTOR_POOL_SIZE, minimum=1)
+
+
+def get_executor():
+    """
+    Returns a thread pool for synchronous handlers,
+    None if handlers should run on the event loop
+    :return: executor
+    :rtype: concurrent.futures.ThreadPoolExecutor
+    """
+    global __executor__
+    if __executor__ is not None:
+        return __executor__
+
+    mode = sync_executor_mode()
+    if mode in (constants.SYNC_EXECUTOR_INLINE,
+                constants.SYNC_EXECUTOR_PROCESS):
+        # process mode is served by fdk.process_pool
+        return None
+    if mode != constants.SYNC_EXECUTOR_THREAD:
+        raise ValueError("unsupported {0} value: {1}".format(
+            constants.FDK_SYNC_EXECUTOR, mode))
+
+    size = pool_size()
+    log.log("starting sync handler thread pool, size: {0}".format(size))
+    __executor__ = futures.ThreadPoolExecutor(
+        max_workers=size, thread_name_prefix="fdk-handler")
+    return __executor__
+
+
+def shutdown():
+    """
+    Stops a thread pool for synchronous handlers if any
+    :return: None
+    """
+    global __executor__
+    if __executor__ is not None:
+        __executor__.shutdown(wait=False)
+        __executor__ = None
+
+
+async def run_sync(executor, func, *args, **kwargs):
+    """
+    Runs a synchronous function within an executor,
+    function sees a copy of the caller's context variables,
+    i.e., a request ID set by fdk.log.set_request_id
+    :param executor: executor
+    :type executor: concurrent.futures.Executor
+    :param func: synchronous function
+    :type func: callable
+    :return: function's result
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(
+        contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
@@ -15,6 +15,8 @@
 #
 
 import datetime as dt
+import inspect
+import types
 
 from fdk import constants
 from fdk import runner
@@ -23,7 +25,10 @@ from fdk import headers as hs
 
 async def process_response(fn_call_coro):
     resp = await fn_call_coro
-    response_data = resp.body()
+    if resp.is_streaming():
+        response_data = await resp.read_all()
+    else:
+        response_data = resp.body()
     response_status = resp.status()
     response_headers = resp.context().GetResponseHeaders()
 
@@ -35,16 +40,30 @@ class fake_request(object):
     def __init__(self, gateway=False):
         self.headers = setup_headers(gateway=gateway)
         self.body = b''
+        self.stream = None
+
+    def on_disconnect(self, callback):
+        pass
 
 
 class code(object):
 
     def __init__(self, fn):
         self.fn = fn
+        self.state = types.SimpleNamespace()
 
     def handler(self):
         return self.fn
 
+    def load(self):
+        return self.fn
+
+    async def startup(self):
+        pass
+
+    def is_coroutine(self):
+        return inspect.iscoroutinefunction(self.fn)
+
 
 def setup_headers(deadline=None, headers=None,
                   request_url="/", method="POST", gateway=False):
@@ -14,26 +14,248 @@
 # limitations under the License.
 #
 
+import sys
+
 from fdk import constants
 
+# lower case names of the headers seen, most requests and responses
+# repeat the same names, names seen after the cache is full
+# are converted every time
+HEADER_NAMES_CACHE_SIZE = 1024
+_header_names = {}
+_missing = object()
+_get = dict.get
+_set = dict.__setitem__
+_has = dict.__contains__
+
+
+def header_name(name):
+    """
+    Converts a header name to lower case and interns it,
+    names seen before are taken from a cache
+    :param name: header name
+    :type name: str or bytes
+    :return: header name in lower case
+    :rtype: str
+    """
+    lowered = _header_names.get(name)
+    if lowered is not None:
+        return lowered
+    lowered = name.decode("latin_1") if type(name) is bytes else name
+    lowered = sys.intern(lowered.lower())
+    if len(_header_names) < HEADER_NAMES_CACHE_SIZE:
+        _header_names[name] = lowered
+    return lowered
+
+
+class _Values(list):
+    """Values of a repeated header, owned by its Headers"""
+
+    __slots__ = ()
+
+
+def _own(value):
+    # values of a repeated header are appended to in place,
+    # they are not shared between headers
+    return value if type(value) is not _Values else _Values(value)
+
+
+class Headers(dict):
+    """
+    Request and response headers. Names are kept in lower case
+    and interned, lookups are case-insensitive and take one dict lookup
+    for names in lower case.
+
+    Repeated headers are kept: a name that repeats maps to a list
+    of its values, same as push_header() would build it, values added
+    later are appended to that list in place. getlist() always returns
+    a list.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, headers=None, **kwargs):
+        if headers:
+            self.extend(headers)
+        if kwargs:
+            self.extend(kwargs)
+
+    def append(self, name, value):
+        """
+        Adds a header, the name must come from header_name()
+        :param name: header name in lower case
+        :type name: str
+        :param value: header value
+        :type value: str
+        :return: None
+        """
+        current = _get(self, name, _missing)
+        if current is _missing:
+            _set(self, name, _own(value))
+        elif type(current) is _Values:
+            if type(value) is list:
+                current.extend(value)
+            else:
+                current.append(value)
+        else:
+            values = _Values(
+                current if type(current) is list else (current,))
+            if type(value) is list:
+                values.extend(value)
+            else:
+                values.append(value)
+            _set(self, name, values)
+
+    def add(self, name, value):
+        """
+        Adds a header, headers with the same name are kept
+        :param name: header name
+        :type name: str
+        :param value: header value
+        :type value: str
+        :return: None
+        """
+        self.append(header_name(name), value)
+
+    def extend(self, headers):
+        """
+        Adds headers, a mapping or (name, value) pairs
+        :param headers: headers
+        :type headers: dict
+        :return: None
+        """
+        if isinstance(headers, Headers):
+            for name, value in headers.items():
+                self.append(name, value)
+            return
+        if hasattr(headers, "items"):
+            headers = headers.items()
+        for name, value in headers:
+            self.append(header_name(name), value)
+
+    def getlist(self, name):
+        """
+        Returns all values of a header
+        :param name: header name
+        :type name: str
+        :return: header values, empty if there are none
+        :rtype: list
+        """
+        value = self.get(name, _missing)
+        if value is _missing:
+            return []
+        if isinstance(value, list):
+            return list(value)
+        return [value]
+
+    def copy(self):
+        headers = Headers()
+        for name, value in self.items():
+            _set(headers, name, _own(value))
+        return headers
+
+    def __getitem__(self, name):
+        value = _get(self, name, _missing)
+        if value is _missing:
+            if type(name) is not str:
+                raise KeyError(name)
+            value = _get(self, name.lower(), _missing)
+            if value is _missing:
+                raise KeyError(name)
+        return value
+
+    def get(self, name, default=None):
+        value = _get(self, name, _missing)
+        if value is _missing:
+            if type(name) is not str:
+                return default
+            return _get(self, name.lower(), default)
+        return value
+
+    def __contains__(self, name):
+        if _has(self, name):
+            return True
+        return type(name) is str and _has(self, name.lower())
+
+    def __setitem__(self, name, value):
+        _set(self, header_name(name), _own(value))
+
+    def __delitem__(self, name):
+        super(Headers, self).__delitem__(header_name(name))
+
+    def pop(self, name, *args):
+        return super(Headers, self).pop(header_name(name), *args)
+
+    def setdefault(self, name, default=None):
+        return super(Headers, self).setdefault(header_name(name), default)
+
+    def update(self, headers=(), **kwargs):
+        if isinstance(headers, Headers):
+            # names are converted already
+            for name, value in headers.items():
+                _set(self, name, _own(value))
+            headers = ()
+        elif hasattr(headers, "items"):
+            headers = headers.items()
+        for name, value in headers:
+            _set(self, header_name(name), _own(value))
+        for name, value in kwargs.items():
+            _set(self, header_name(name), _own(value))
+
+    def __repr__(self):
+        return "{0}({1})".format(
+            self.__class__.__name__, super(Headers, self).__repr__())
+
 
 def decap_headers(hdsr, merge=True):
-    ctx_headers = {}
+    ctx_headers = Headers()
     if hdsr is not None:
         for k, v in hdsr.items():
-            k = k.lower()
+            k = header_name(k)
             if k.startswith(constants.FN_HTTP_PREFIX):
-                push_header(ctx_headers, k[len(constants.FN_HTTP_PREFIX):], v)
+                ctx_headers.add(k[len(constants.FN_HTTP_PREFIX):], v)
             elif merge:
                 # http headers override functions headers in context
                 # this is not ideal but it's the more correct view from the
                 # consumer perspective than random choice and for things
                 # like host headers
-                if k not in ctx_headers:
-                    ctx_headers[k] = v
+                if not _has(ctx_headers, k):
+                    ctx_headers.append(k, v)
     return ctx_headers
 
 
+def decap_gateway_headers(hdsr):
+    """
+    Builds both views of gateway request headers in one pass,
+    same as decap_headers(hdsr, True) and decap_headers(hdsr, False)
+    :param hdsr: request headers
+    :type hdsr: Headers
+    :return: merged headers and HTTP headers
+    :rtype: tuple
+    """
+    ctx_headers = Headers()
+    http_headers = Headers()
+    if hdsr is not None:
+        prefix = constants.FN_HTTP_PREFIX
+        # request headers from the server have their names converted
+        lowered = isinstance(hdsr, Headers)
+        for k, v in hdsr.items():
+            if not lowered:
+                k = header_name(k)
+            if k.startswith(prefix):
+                k = header_name(k[len(prefix):])
+                if type(v) is str and not _has(http_headers, k):
+                    # a header that does not repeat, the usual case
+                    _set(http_headers, k, v)
+                else:
+                    http_headers.append(k, v)
+                ctx_headers.append(k, v)
+            elif not _has(ctx_headers, k):
+                _set(ctx_headers, k,
+                     v if type(v) is not _Values else _Values(v))
+    return ctx_headers, http_headers
+
+
 def push_header(input_map, key, value):
     if key not in input_map:
         input_map[key] = value
@@ -58,20 +280,20 @@ def push_header(input_map, key, value):
 
 
 def encap_headers(headers, status=None):
-    new_headers = {}
+    new_headers = Headers()
     if headers is not None:
         for k, v in headers.items():
-            k = k.lower()
+            k = header_name(k)
             if k.startswith(constants.FN_HTTP_PREFIX):  # by default merge
-                push_header(new_headers, k, v)
+                new_headers.append(k, v)
             if (k == constants.CONTENT_TYPE
                     or k == constants.FN_FDK_VERSION
                     or k == constants.FN_FDK_RUNTIME):  # but don't merge these
-                new_headers[k] = v
+                _set(new_headers, k, _own(v))
             else:
-                push_header(new_headers, constants.FN_HTTP_PREFIX + k, v)
+                new_headers.add(constants.FN_HTTP_PREFIX + k, v)
 
     if status is not None:
-        new_headers[constants.FN_HTTP_STATUS] = str(status)
+        _set(new_headers, constants.FN_HTTP_STATUS, str(status))
 
     return new_headers
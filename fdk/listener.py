@@ -0,0 +1,314 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import functools
+import gc
+import inspect
+import os
+import socket
+import sys
+
+from fdk import admission
+from fdk import constants
+from fdk import context
+from fdk import event_handler
+from fdk import customer_code
+from fdk import executor
+from fdk import log
+from fdk import process_pool
+from fdk import startup
+from fdk import workers
+
+from fdk.async_http import app
+from fdk.async_http import router
+
+startup.mark("server_imported")
+
+
+def start(handle_code: customer_code.Function,
+          uds: str,
+          loop: asyncio.AbstractEventLoop = None,
+          request_max_size: int = None):
+    """
+    Unix domain socket HTTP server entry point
+    :param handle_code: customer's code
+    :type handle_code: fdk.customer_code.Function
+    :param uds: path to a Unix domain socket
+    :type uds: str
+    :param loop: event loop
+    :type loop: asyncio.AbstractEventLoop
+    :param request_max_size: request size limit in bytes,
+        FDK_REQUEST_MAX_SIZE or 100MB by default
+    :type request_max_size: int
+    :return: None
+    """
+    log.log("in http_stream.start")
+    socket_path = os.path.normpath(str(uds).lstrip("unix:"))
+    socket_dir, socket_file = os.path.split(socket_path)
+    if socket_file == "":
+        sys.exit("malformed FN_LISTENER env var "
+                 "value: {0}".format(socket_path))
+
+    phony_socket_path = os.path.join(
+        socket_dir, "phony" + socket_file)
+
+    log.log("deleting socket files if they exist")
+    try:
+        os.remove(socket_path)
+        os.remove(phony_socket_path)
+    except OSError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(phony_socket_path)
+    startup.mark("socket_bound")
+
+    def publish():
+        log.log("CHMOD 666 {0}".format(phony_socket_path))
+        os.chmod(phony_socket_path, 0o666)
+        log.log("phony socket permissions: {0}"
+                .format(oct(os.stat(phony_socket_path).st_mode)))
+        log.log("sym-linking {0} to {1}".format(
+            socket_path, phony_socket_path))
+        os.symlink(os.path.basename(phony_socket_path), socket_path)
+        startup.mark("socket_published")
+        log.log("socket permissions: {0}"
+                .format(oct(os.stat(socket_path).st_mode)))
+
+    count = workers.workers_count()
+    if is_eager_load():
+        # the platform routes traffic once the socket is published,
+        # so the first call should not pay for imports
+        warm_up(handle_code)
+
+    if count == 1:
+        return serve(handle_code, sock, loop=loop, on_serving=publish,
+                     request_max_size=request_max_size)
+
+    # the kernel queues connections until listeners pick them up
+    sock.listen(constants.LISTEN_BACKLOG)
+    log.log("loading function module before forking listeners")
+    handle_code.load()
+    # keeps import-time objects in pages shared with the listeners
+    gc.freeze()
+
+    supervisor = workers.Supervisor(
+        count, functools.partial(serve, handle_code, sock,
+                                 request_max_size=request_max_size))
+    try:
+        supervisor.start()
+        publish()
+        log.log("supervising {0} listeners".format(count))
+    except (Exception, BaseException) as ex:
+        log.log(str(ex))
+        supervisor.stop(None, None)
+        raise ex
+
+    supervisor.run()
+
+
+def is_eager_load():
+    return os.environ.get(
+        constants.FDK_EAGER_LOAD, "").lower() in constants.TRUTHY_VALUES
+
+
+def max_request_size():
+    """
+    Returns a size limit for requests, headers included,
+    larger requests are rejected with 413 before they are read in full
+    :return: size in bytes
+    :rtype: int
+    """
+    return constants.int_env(constants.FDK_REQUEST_MAX_SIZE,
+                             constants.DEFAULT_REQUEST_MAX_SIZE, minimum=1)
+
+
+def request_stream(handle_code: customer_code.Function):
+    """
+    Tells whether function's request bodies are streamed, only coroutine
+    functions read a stream, others get the whole body
+    :param handle_code: customer's code
+    :type handle_code: fdk.customer_code.Function
+    :return: False, or a check run once a request arrives,
+        the module may not be loaded yet
+    :rtype: callable
+    """
+    if os.environ.get(constants.FDK_REQUEST_STREAM,
+                      "").lower() not in constants.TRUTHY_VALUES:
+        return False
+    return handle_code.is_coroutine
+
+
+def request_spill_size():
+    """
+    Returns a request body size above which bodies are written
+    to a temporary file instead of being kept in memory
+    :return: size in bytes, None if bodies are kept in memory
+    :rtype: int
+    """
+    return constants.int_env(constants.FDK_REQUEST_SPILL_SIZE) or None
+
+
+def warm_up(handle_code: customer_code.Function):
+    """
+    Imports customer's module and runs its optional warmup(ctx) hook,
+    a coroutine hook is left to the server loop, see async_warm_up
+    :param handle_code: customer's code
+    :type handle_code: fdk.customer_code.Function
+    :return: None
+    """
+    log.log("eager loading function module")
+    handle_code.load()
+    hook = handle_code.warmup()
+    if hook is None or inspect.iscoroutinefunction(hook):
+        return
+
+    log.log("running function warm-up hook")
+    hook(warm_up_context())
+    log.log("function warm-up completed")
+
+
+async def async_warm_up(handle_code: customer_code.Function):
+    """
+    Runs customer's coroutine warmup(ctx) hook on the loop
+    that serves calls, objects it makes may be bound to that loop
+    :param handle_code: customer's code
+    :type handle_code: fdk.customer_code.Function
+    :return: None
+    """
+    hook = handle_code.warmup()
+    if not inspect.iscoroutinefunction(hook):
+        return
+
+    log.log("running function warm-up coroutine")
+    await hook(warm_up_context())
+    log.log("function warm-up completed")
+
+
+def warm_up_context():
+    ctx, _ = context.context_from_format(
+        constants.HTTPSTREAM, headers={}, data=None)
+    return ctx
+
+
+def serve(handle_code: customer_code.Function,
+          sock: socket.socket,
+          loop: asyncio.AbstractEventLoop = None,
+          on_serving=None,
+          request_max_size: int = None):
+    """
+    Serves function invocations on a bound socket
+    :param handle_code: customer's code
+    :type handle_code: fdk.customer_code.Function
+    :param sock: bound Unix domain socket
+    :type sock: socket.socket
+    :param loop: event loop
+    :type loop: asyncio.AbstractEventLoop
+    :param on_serving: called once the server accepts connections
+    :type on_serving: callable
+    :param request_max_size: request size limit in bytes,
+        FDK_REQUEST_MAX_SIZE or 100MB by default
+    :type request_max_size: int
+    :return: None
+    """
+    # validates sync executor settings before accepting requests
+    executor.get_executor()
+    # workers are forked before the server accepts connections
+    process_pool.start(handle_code)
+
+    if request_max_size is None:
+        request_max_size = max_request_size()
+    spill_size = request_spill_size()
+
+    rtr = router.Router()
+    rtr.add("/call", frozenset({"POST"}),
+            event_handler.event_handle(
+                handle_code, limiter=admission.start()),
+            stream=request_stream(handle_code))
+
+    async def on_start(server_loop):
+        if is_eager_load():
+            await async_warm_up(handle_code)
+        # a module that is not loaded yet gets started on the first call,
+        # the process pool workers run customer's code themselves
+        if handle_code.is_loaded() and process_pool.get_pool() is None:
+            await handle_code.startup()
+
+    def on_stop(server_loop):
+        return handle_code.shutdown()
+
+    srv = app.AsyncHTTPServer(name="fdk", router=rtr)
+    start_serving, server_forever = srv.run(
+        sock=sock, loop=loop, before_start=[on_start], after_stop=[on_stop],
+        request_max_size=request_max_size, request_spill_size=spill_size)
+
+    try:
+        log.log("calling '.start_serving()'")
+        start_serving()
+        startup.mark("serving")
+        if on_serving is not None:
+            on_serving()
+        log.log("starting infinite loop")
+
+    except (Exception, BaseException) as ex:
+        log.log(str(ex))
+        raise ex
+
+    try:
+        server_forever()
+    finally:
+        executor.shutdown()
+        process_pool.shutdown()
+
+
+def handle(handle_code: customer_code.Function):
+    """
+    FDK entry point
+    :param handle_code: customer's code
+    :type handle_code: fdk.customer_code.Function
+    :return: None
+    """
+    startup.mark("handle")
+    log.log("entering handle")
+    if not isinstance(handle_code, customer_code.Function):
+        sys.exit(
+            '\n\n\nWARNING!\n\n'
+            'Your code is not compatible the the latest FDK!\n\n'
+            'Update Dockerfile entry point to:\n'
+            'ENTRYPOINT["/python/bin/fdk", "<path-to-your-func.py>", {0}]\n\n'
+            'if __name__ == "__main__":\n\tfdk.handle(handler)\n\n'
+            'syntax no longer supported!\n'
+            'Update your code as soon as possible!'
+            '\n\n\n'.format(handle_code.__name__))
+
+    loop = asyncio.get_event_loop()
+
+    format_def = os.environ.get(constants.FN_FORMAT)
+    lsnr = os.environ.get(constants.FN_LISTENER)
+    log.log("{0} is set, value: {1}".
+            format(constants.FN_FORMAT, format_def))
+
+    if lsnr is None:
+        sys.exit("{0} is not set".format(constants.FN_LISTENER))
+
+    log.log("{0} is set, value: {1}".
+            format(constants.FN_LISTENER, lsnr))
+
+    if format_def == constants.HTTPSTREAM:
+        start(handle_code, lsnr, loop=loop)
+    else:
+        sys.exit("incompatible function format!")
@@ -66,6 +66,10 @@ def get_logger():
     return __log__
 
 
+def enabled():
+    return __log__.isEnabledFor(logging.DEBUG)
+
+
 def log(message):
     __log__.debug(message)
 
@@ -0,0 +1,113 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import argparse
+import importlib.util
+import os
+import py_compile
+import zipfile
+
+# bytecode is trusted as is, imports never read or hash the source
+INVALIDATION_MODE = py_compile.PycInvalidationMode.UNCHECKED_HASH
+ZIPAPP_SUFFIX = ".pyz"
+
+
+def source_files(func_dir):
+    """
+    Lists function's Python sources, hidden directories are skipped
+    :param func_dir: function directory
+    :type func_dir: str
+    :return: paths relative to the function directory
+    :rtype: list
+    """
+    sources = []
+    for root, dirs, files in os.walk(func_dir):
+        dirs[:] = sorted(d for d in dirs
+                         if not d.startswith(".") and d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                sources.append(os.path.relpath(
+                    os.path.join(root, name), func_dir))
+    return sources
+
+
+def compile_source(func_dir, source):
+    path = os.path.join(func_dir, source)
+    return py_compile.compile(
+        path, cfile=importlib.util.cache_from_source(path), doraise=True,
+        invalidation_mode=INVALIDATION_MODE)
+
+
+def compile_tree(func_dir):
+    """
+    Compiles function's sources into __pycache__ next to them
+    :param func_dir: function directory
+    :type func_dir: str
+    :return: number of compiled sources
+    :rtype: int
+    """
+    sources = source_files(func_dir)
+    for source in sources:
+        compile_source(func_dir, source)
+    return len(sources)
+
+
+def build_zipapp(func_module, target=None):
+    """
+    Packs compiled function's module and the modules next to it
+    into an archive that holds bytecode only
+    :param func_module: path to function's module
+    :type func_module: str
+    :param target: archive path, <module>.pyz next to the module by default
+    :type target: str
+    :return: archive path
+    :rtype: str
+    """
+    func_dir = os.path.dirname(os.path.abspath(func_module))
+    if target is None:
+        name = os.path.splitext(os.path.basename(func_module))[0]
+        target = os.path.join(func_dir, name + ZIPAPP_SUFFIX)
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_STORED) as archive:
+        for source in source_files(func_dir):
+            # sourceless layout: pkg/mod.py goes in as pkg/mod.pyc
+            archive.write(compile_source(func_dir, source), source + "c")
+    return target
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog="fdk pack",
+        description="Compiles a function ahead of time, "
+                    "so a cold start does not parse its sources")
+    parser.add_argument("func_module", help="path to a function module")
+    parser.add_argument("--zipapp", action="store_true",
+                        help="pack bytecode into a <module>.pyz archive")
+    parser.add_argument("-o", "--output", help="archive path")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.func_module):
+        return "Module: {0} doesn't exist".format(args.func_module)
+
+    if args.zipapp or args.output:
+        target = build_zipapp(args.func_module, target=args.output)
+        print("packed {0}".format(target))
+        return 0
+
+    func_dir = os.path.dirname(os.path.abspath(args.func_module))
+    count = compile_tree(func_dir)
+    print("compiled {0} modules in {1}".format(count, func_dir))
+    return 0
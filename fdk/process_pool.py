@@ -0,0 +1,352 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import functools
+import io
+import os
+import pickle
+import signal
+import socket
+import struct
+
+from multiprocessing import connection
+
+from fdk import constants
+from fdk import context
+from fdk import executor
+from fdk import log
+from fdk import response
+from fdk import startup
+from fdk import zygote
+
+
+__pool__ = None
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def _frame(size):
+    # multiprocessing.connection's wire format, workers
+    # read and write their end with a blocking Connection
+    if size > 0x7fffffff:
+        return struct.pack("!iQ", -1, size)
+    return struct.pack("!i", size)
+
+
+async def _send_message(loop, sock, payload):
+    await loop.sock_sendall(sock, _frame(len(payload)))
+    await loop.sock_sendall(sock, payload)
+
+
+async def _recv_exactly(loop, sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = await loop.sock_recv_into(sock, view[received:])
+        if n == 0:
+            raise EOFError
+        received += n
+    return buf
+
+
+async def _recv_message(loop, sock):
+    size, = struct.unpack("!i", await _recv_exactly(loop, sock, 4))
+    if size == -1:
+        size, = struct.unpack("!Q", await _recv_exactly(loop, sock, 8))
+    return await _recv_exactly(loop, sock, size)
+
+
+def _serve_worker(handler_code, conn):
+    """
+    Worker process main loop: receives request headers and body,
+    runs the customer's code, sends back status, headers and body
+    :param handler_code: customer's code
+    :type handler_code: fdk.customer_code.Function
+    :param conn: parent process channel
+    :type conn: multiprocessing.connection.Connection
+    :return: None
+    """
+    global __pool__
+    from fdk import runner
+
+    # a worker runs invocations in-process only
+    __pool__ = None
+    # the parent reports the container's startup
+    startup.reset()
+    # the parent's loop may have been running while forking
+    asyncio.events._set_running_loop(None)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    log.log("worker {0}: loading function module".format(os.getpid()))
+    handler_code.handler()
+
+    while True:
+        try:
+            headers = conn.recv()
+            body = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+
+        func_response = loop.run_until_complete(runner.handle_request(
+            handler_code, constants.HTTPSTREAM,
+            headers=headers, data=io.BytesIO(body)))
+
+        # streamed responses are collected, only one message
+        # per invocation goes back to the parent
+        body = loop.run_until_complete(func_response.read_all())
+        conn.send((func_response.status(),
+                   func_response.context().GetResponseHeaders()))
+        conn.send_bytes(body)
+
+
+class Worker(object):
+
+    def __init__(self, handler_code, template=None):
+        """
+        Pre-forked worker process
+        :param handler_code: customer's code
+        :type handler_code: fdk.customer_code.Function
+        :param template: zygote to fork the worker from
+        :type template: fdk.zygote.Zygote
+        """
+        self.handler_code = handler_code
+        self.template = template
+        self.pid = None
+        self.sock = None
+
+    def spawn(self):
+        if self.template is not None:
+            self.pid, self.sock = self.template.fork()
+            self.sock.setblocking(False)
+            log.log("worker {0} forked by zygote".format(self.pid))
+            return
+
+        parent_sock, child_sock = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                parent_sock.close()
+                zygote.prepare_child(child_sock.fileno())
+                _serve_worker(
+                    self.handler_code,
+                    connection.Connection(child_sock.detach()))
+            except BaseException as ex:
+                log.log("worker {0} failed: {1}".format(os.getpid(), ex))
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        child_sock.close()
+        parent_sock.setblocking(False)
+        self.pid = pid
+        self.sock = parent_sock
+        log.log("worker {0} started".format(pid))
+
+    def kill(self):
+        if self.pid is None:
+            return
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.reap()
+
+    def reap(self):
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            pass
+        self.sock.close()
+        self.pid = None
+        self.sock = None
+
+    def respawn(self):
+        self.kill()
+        self.spawn()
+
+    async def invoke(self, headers, data, timeout):
+        """
+        Sends an invocation to a worker and waits for the result
+        :param headers: request headers
+        :type headers: dict
+        :param data: request body
+        :type data: io.BytesIO
+        :param timeout: number of seconds to wait for
+        :type timeout: float
+        :return: status, headers, body
+        :rtype: tuple
+        """
+        return await asyncio.wait_for(
+            self.exchange(headers, data), timeout)
+
+    async def exchange(self, headers, data):
+        # the worker's channel is non-blocking,
+        # the event loop keeps serving while it runs
+        loop = asyncio.get_running_loop()
+        await _send_message(loop, self.sock, pickle.dumps(headers))
+        if hasattr(data, "getbuffer"):
+            # getbuffer() does not copy request data
+            with data.getbuffer() as body:
+                await _send_message(loop, self.sock, body)
+        else:
+            await _send_message(loop, self.sock, data if data else b"")
+
+        try:
+            status, resp_headers = pickle.loads(
+                await _recv_message(loop, self.sock))
+            body = await _recv_message(loop, self.sock)
+        except (EOFError, ConnectionResetError):
+            raise WorkerCrashed("function worker {0} crashed"
+                                .format(self.pid))
+        return status, resp_headers, body
+
+
+class ProcessPool(object):
+
+    def __init__(self, handler_code, size):
+        """
+        Pool of pre-forked worker processes
+        :param handler_code: customer's code
+        :type handler_code: fdk.customer_code.Function
+        :param size: number of workers
+        :type size: int
+        """
+        self.template = None
+        if zygote.is_enabled():
+            self.template = zygote.Zygote(
+                functools.partial(_serve_worker, handler_code),
+                prepare=handler_code.load)
+        self.workers = [Worker(handler_code, template=self.template)
+                        for _ in range(size)]
+        self._idle = None
+
+    def start(self):
+        if self.template is not None:
+            self.template.start()
+        for worker in self.workers:
+            worker.spawn()
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.kill()
+        if self.template is not None:
+            self.template.stop()
+
+    def idle(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for worker in self.workers:
+                self._idle.put_nowait(worker)
+        return self._idle
+
+    async def handle(self, ctx, headers, data):
+        """
+        Runs an invocation on an idle worker within the request deadline
+        :param ctx: invoke context
+        :type ctx: fdk.context.InvokeContext
+        :param headers: raw request headers
+        :type headers: dict
+        :param data: request data stream
+        :type data: io.BytesIO
+        :return: function's response
+        :rtype: fdk.response.Response
+        """
+        from fdk.async_http import request
+        if isinstance(data, request.StreamBuffer):
+            # workers get the whole body at once
+            data = io.BytesIO(await data.readall())
+        elif isinstance(data, io.IOBase) and not hasattr(data, "getbuffer"):
+            # a body in a temporary file
+            data = io.BytesIO(data.read())
+
+        timeout = context.time_left(ctx.Deadline())
+        idle = self.idle()
+        try:
+            worker = await asyncio.wait_for(idle.get(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("no function worker available "
+                               "before the deadline")
+
+        try:
+            timeout = context.time_left(ctx.Deadline())
+            status, resp_headers, body = await worker.invoke(
+                headers, data, timeout)
+        except asyncio.TimeoutError:
+            log.log("worker {0} missed the deadline, restarting"
+                    .format(worker.pid))
+            worker.respawn()
+            raise TimeoutError("function timed out")
+        except (WorkerCrashed, OSError) as ex:
+            log.log("{0}, restarting".format(ex))
+            worker.respawn()
+            raise WorkerCrashed(str(ex))
+        except BaseException:
+            # the worker's channel state is unknown
+            worker.respawn()
+            raise
+        finally:
+            idle.put_nowait(worker)
+
+        # worker's response headers are final, they were set
+        # on the worker's copy of a context
+        ctx.GetResponseHeaders().update(resp_headers)
+        return response.Response(
+            ctx, response_data=body, status_code=status)
+
+
+def get_pool():
+    """
+    Returns a process pool if process execution mode is on
+    :return: process pool
+    :rtype: ProcessPool
+    """
+    return __pool__
+
+
+def start(handler_code):
+    """
+    Forks worker processes if process execution mode is on,
+    must be called before the server accepts requests
+    :param handler_code: customer's code
+    :type handler_code: fdk.customer_code.Function
+    :return: process pool
+    :rtype: ProcessPool
+    """
+    global __pool__
+    if executor.sync_executor_mode() != constants.SYNC_EXECUTOR_PROCESS:
+        return None
+    size = executor.pool_size()
+    log.log("starting function process pool, size: {0}".format(size))
+    __pool__ = ProcessPool(handler_code, size)
+    __pool__.start()
+    return __pool__
+
+
+def shutdown():
+    """
+    Stops worker processes if any
+    :return: None
+    """
+    global __pool__
+    if __pool__ is not None:
+        __pool__.shutdown()
+        __pool__ = None
@@ -14,6 +14,10 @@
 # limitations under the License.
 #
 
+import inspect
+import io
+import os
+
 from fdk import context
 from fdk import constants
 from typing import Union
@@ -30,7 +34,9 @@ class Response(object):
         Creates an FDK-readable response object
         :param ctx: invoke context
         :type ctx: fdk.context.InvokeContext
-        :param response_data: function's response data
+        :param response_data: function's response data,
+            a generator or an async generator streams the response,
+            a binary file or a path sends the file
         :type response_data: str
         :param headers: response headers
         :type headers: dict
@@ -46,10 +52,7 @@ class Response(object):
 
         if headers is None:
             headers = {}
-        headers.update({constants.FN_FDK_VERSION:
-                        constants.VERSION_HEADER_VALUE,
-                        constants.FN_FDK_RUNTIME:
-                        constants.RUNTIME_HEADER_VALUE, })
+        headers.update(constants.FDK_RESPONSE_HEADERS)
         ctx.SetResponseHeaders(headers, status_code)
         self.ctx = ctx
 
@@ -60,11 +63,90 @@ class Response(object):
         return self.response_data
 
     def body_bytes(self):
-        if isinstance(self.response_data, bytes) or \
-                isinstance(self.response_data, bytearray):
+        if isinstance(self.response_data, (bytes, bytearray, memoryview)):
             return self.response_data
+        elif self.is_file():
+            with self.file() as f:
+                return f.read()
+        elif hasattr(self.response_data, "read"):
+            return self.encode_chunk(self.response_data.read())
         else:
             return str(self.response_data).encode(self.response_encoding)
 
+    def is_file(self):
+        data = self.response_data
+        if isinstance(data, os.PathLike):
+            return True
+        if not hasattr(data, "read") or isinstance(data, io.TextIOBase):
+            return False
+        try:
+            data.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        return True
+
+    def file(self):
+        """
+        Returns a file to send as a response body
+        :return: file opened in binary mode
+        :rtype: io.BufferedReader
+        """
+        if isinstance(self.response_data, os.PathLike):
+            return open(self.response_data, "rb")
+        return self.response_data
+
+    def is_streaming(self):
+        return (inspect.isgenerator(self.response_data)
+                or inspect.isasyncgen(self.response_data))
+
+    def encode_chunk(self, chunk):
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            return chunk
+        return str(chunk).encode(self.response_encoding)
+
+    async def chunks(self):
+        """
+        Iterates over a streaming response,
+        blocking generators are advanced in a thread pool if it is on
+        :return: encoded chunks
+        :rtype: collections.abc.AsyncIterator
+        """
+        from fdk import executor
+        gen = self.response_data
+        if inspect.isasyncgen(gen):
+            async for chunk in gen:
+                yield self.encode_chunk(chunk)
+            return
+
+        pool = executor.get_executor()
+        sentinel = object()
+        try:
+            while True:
+                if pool is not None:
+                    chunk = await executor.run_sync(
+                        pool, next, gen, sentinel)
+                else:
+                    chunk = next(gen, sentinel)
+                if chunk is sentinel:
+                    return
+                yield self.encode_chunk(chunk)
+        finally:
+            try:
+                gen.close()
+            except ValueError:
+                # still being advanced in a thread past the deadline,
+                # the code is told through ctx.Cancelled()
+                pass
+
+    async def read_all(self):
+        """
+        Collects a streaming response
+        :return: response body
+        :rtype: bytes
+        """
+        if not self.is_streaming():
+            return self.body_bytes()
+        return b"".join([bytes(chunk) async for chunk in self.chunks()])
+
     def context(self):
         return self.ctx
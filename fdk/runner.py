@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import asyncio
 import io
 import sys
 import traceback
@@ -22,8 +23,11 @@ import types
 from fdk import context
 from fdk import customer_code
 from fdk import errors
+from fdk import executor
 from fdk import log
+from fdk import process_pool
 from fdk import response
+from fdk import startup
 
 
 async def with_deadline(ctx: context.InvokeContext,
@@ -42,14 +46,42 @@ async def with_deadline(ctx: context.InvokeContext,
 
     # ctx.Deadline() would never be an empty value,
     # by default it will be 30 secs from now
+    deadline = ctx.Deadline()
 
     try:
+        if context.time_left(deadline) <= 0:
+            raise asyncio.TimeoutError()
+
         handle_func = handler_code.handler()
-        result = handle_func(ctx, data=data)
+        pool = executor.get_executor()
+        if handler_code.is_coroutine():
+            # coroutines get cancelled once the deadline has passed
+            return await asyncio.wait_for(
+                handle_func(ctx, data=data), context.time_left(deadline))
+        elif pool is not None:
+            # blocking code must not freeze the event loop,
+            # a thread can't be cancelled, so the code gets notified
+            # through ctx.Cancelled()
+            result = await asyncio.wait_for(
+                executor.run_sync(pool, handle_func, ctx, data=data),
+                context.time_left(deadline))
+        else:
+            result = handle_func(ctx, data=data)
+
         if isinstance(result, types.CoroutineType):
-            return await result
+            return await asyncio.wait_for(
+                result, context.time_left(deadline))
+        if context.time_left(deadline) <= 0:
+            raise asyncio.TimeoutError()
 
         return result
+    except asyncio.TimeoutError as ex:
+        if context.time_left(deadline) > 0:
+            # raised by customer's code
+            raise ex
+        ctx.Cancel()
+        raise TimeoutError(
+            "function exceeded its deadline {0}".format(deadline))
     except (Exception, TimeoutError) as ex:
         raise ex
 
@@ -67,11 +99,46 @@ async def handle_request(handler_code, format_def, **kwargs):
     :rtype: fdk.response.Response
     """
     log.log("in handle_request")
-    ctx, body = context.context_from_format(format_def, **kwargs)
+    ctx, body = context.context_from_format(
+        format_def, state=handler_code.state, **kwargs)
     log.set_request_id(ctx.CallID())
     log.log("context provisioned")
+    if startup.first_invocation(ctx.CallID()):
+        log.log("first invocation since the process started")
+        try:
+            return await handle_invocation(handler_code, ctx, body, kwargs)
+        finally:
+            startup.report()
+    return await handle_invocation(handler_code, ctx, body, kwargs)
+
+
+async def handle_invocation(handler_code, ctx, body, kwargs):
+    """
+    Runs an invocation and turns its result into a response
+    :param handler_code: customer's code
+    :type handler_code: fdk.customer_code.Function
+    :param ctx: invoke context
+    :type ctx: fdk.context.InvokeContext
+    :param body: request data stream
+    :type body: io.BytesIO
+    :param kwargs: request-specific parameters
+    :type kwargs: dict
+    :return: function's response
+    :rtype: fdk.response.Response
+    """
+    on_disconnect = kwargs.get("on_disconnect")
+    if on_disconnect is not None:
+        # the caller went away, nobody waits for the result
+        on_disconnect(ctx.Cancel)
     try:
-        response_data = await with_deadline(ctx, handler_code, body)
+        pool = process_pool.get_pool()
+        if pool is not None:
+            response_data = await pool.handle(
+                ctx, kwargs.get("headers"), body)
+        else:
+            # lifespan hook runs once the module gets loaded
+            await handler_code.startup()
+            response_data = await with_deadline(ctx, handler_code, body)
         log.log("function result obtained")
         if isinstance(response_data, response.Response):
             return response_data
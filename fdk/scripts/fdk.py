@@ -26,6 +26,10 @@ def main():
         print("Usage: fdk <func_module> [entrypoint]")
         sys.exit("at least func module must be specified")
 
+    if len(sys.argv) > 1 and sys.argv[1] == "pack":
+        from fdk import pack
+        sys.exit(pack.main(sys.argv[2:]))
+
     if not os.path.exists(sys.argv[1]):
         sys.exit("Module: {0} doesn't exist".format(sys.argv[1]))
 
@@ -0,0 +1,137 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# this module is the first one imported by the FDK,
+# keep its own imports cheap
+import os
+import sys
+import time
+
+from fdk import constants
+
+if hasattr(time, "CLOCK_BOOTTIME"):
+    def clock():
+        # same clock as a process start time in /proc
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+else:
+    clock = time.monotonic
+
+
+def process_start_time():
+    """
+    Returns a moment the process was started at,
+    by the clock() clock, if /proc is available
+    :return: process start time in seconds
+    :rtype: float
+    """
+    if clock is time.monotonic:
+        return None
+    try:
+        with open("/proc/self/stat") as stat:
+            # the process name goes in parentheses and may contain spaces
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+__trace__ = os.environ.get(constants.FDK_STARTUP_TRACE)
+__marks__ = [("fdk_import", clock())]
+__origin__ = process_start_time()
+__first_call__ = None
+
+
+def enabled():
+    return bool(__trace__)
+
+
+def mark(phase):
+    """
+    Timestamps a startup phase
+    :param phase: phase name
+    :type phase: str
+    :return: None
+    """
+    if __trace__:
+        __marks__.append((phase, clock()))
+
+
+def first_invocation(call_id):
+    """
+    Checks whether it is the first invocation handled by the process
+    :param call_id: Fn call ID
+    :type call_id: str
+    :return: first invocation flag
+    :rtype: bool
+    """
+    global __first_call__
+    if __first_call__ is not None:
+        return False
+    __first_call__ = call_id if call_id else ""
+    mark("first_request")
+    return True
+
+
+def reset():
+    """
+    Forgets the startup timeline,
+    used by worker processes forked after startup
+    :return: None
+    """
+    global __first_call__
+    del __marks__[:]
+    __first_call__ = ""
+
+
+def timeline():
+    """
+    Returns startup phases with seconds since the process start,
+    or since the FDK import if the process start time is unknown
+    :return: phase name and time pairs
+    :rtype: list
+    """
+    origin = __origin__ if __origin__ is not None else __marks__[0][1]
+    return [(phase, at - origin) for phase, at in __marks__]
+
+
+def format_report():
+    phases = " ".join("{0}={1:.3f}".format(phase, at)
+                      for phase, at in timeline())
+    return "fdk startup pid={0} call_id={1} since={2}: {3}".format(
+        os.getpid(), __first_call__,
+        "process_start" if __origin__ is not None else "fdk_import",
+        phases)
+
+
+def report():
+    """
+    Writes the startup timeline to stderr or a file,
+    FDK_STARTUP_TRACE is either "stderr" or a path to a file
+    :return: None
+    """
+    if not __trace__ or not __marks__:
+        return
+    mark("first_response")
+    line = format_report()
+    if __trace__.lower() in ("stderr", "true", "1"):
+        print(line, file=sys.stderr, flush=True)
+        return
+    try:
+        with open(__trace__, "a") as f:
+            f.write(line + "\n")
+    except OSError as ex:
+        print("unable to write startup trace to {0}: {1}".format(
+            __trace__, ex), file=sys.stderr, flush=True)
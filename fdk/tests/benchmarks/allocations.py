@@ -0,0 +1,191 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+# Per-request allocation benchmark: drives HTTP gateway invocations
+# through the protocol, app, event handler and runner of a single
+# connection and reports how much memory one request allocates.
+#
+#   python -m fdk.tests.benchmarks.allocations --requests 2000
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from fdk import event_handler
+from fdk import fixtures
+from fdk import response
+
+from fdk.async_http import app
+from fdk.async_http import protocol
+from fdk.async_http import router
+from fdk.async_http import server
+
+BODY = b'{"name":"John"}'
+HEAD = (b"POST /call HTTP/1.1\r\n"
+        b"Host: localhost\r\n"
+        b"Fn-Call-Id: 01E7R2ZPM8NG8G00GZJ0000001\r\n"
+        b"Fn-Deadline: 2300-01-01T00:00:00.000Z\r\n"
+        b"Fn-Intent: httprequest\r\n"
+        b"Fn-Http-Method: POST\r\n"
+        b"Fn-Http-Request-Url: /t/app/hello\r\n"
+        b"Fn-Http-H-Accept: */*\r\n"
+        b"Fn-Http-H-Content-Type: application/json\r\n"
+        b"Fn-Http-H-User-Agent: curl/7.64.1\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: %d\r\n\r\n")
+REQUEST = HEAD % len(BODY) + BODY
+
+
+class Transport(object):
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+    def writelines(self, list_of_data):
+        for data in list_of_data:
+            self.write(data)
+
+    def close(self):
+        pass
+
+    def is_closing(self):
+        return False
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def pause_reading(self):
+        pass
+
+    def resume_reading(self):
+        pass
+
+
+def handler(ctx, data=None):
+    return response.Response(
+        ctx, response_data=data.getvalue(),
+        headers={"Content-Type": "application/json"})
+
+
+def serving_protocol(loop):
+    rtr = router.Router()
+    rtr.add("/call", frozenset({"POST"}),
+            event_handler.event_handle(fixtures.code(handler)))
+    srv = app.AsyncHTTPServer(name="allocations", router=rtr)
+    p = protocol.HttpProtocol(
+        loop=loop, request_handler=srv.handle_request,
+        error_handler=srv.error_handler, signal=server.Signal(),
+        request_max_size=100000000)
+    p.connection_made(Transport())
+    return p
+
+
+def receive(p, data):
+    """
+    Feeds data to a protocol the way a transport does,
+    through get_buffer() and buffer_updated()
+    """
+    with memoryview(data) as view:
+        while view:
+            buffer = p.get_buffer(-1)
+            n = min(len(buffer), len(view))
+            buffer[:n] = view[:n]
+            view = view[n:]
+            p.buffer_updated(n)
+
+
+async def invoke(p, request=REQUEST):
+    receive(p, request)
+    await p._request_handler_task
+
+
+async def measure(requests, body_size=None):
+    loop = asyncio.get_running_loop()
+    p = serving_protocol(loop)
+    request = REQUEST
+    if body_size is not None:
+        request = HEAD % body_size + b"x" * body_size
+        requests = min(requests, 10)
+    # warm up caches and lazy imports
+    for _ in range(10):
+        await invoke(p)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await invoke(p, request)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await invoke(p, request)
+    elapsed = time.perf_counter() - started
+
+    peaks.sort()
+    return {
+        "peak_bytes": peaks[len(peaks) // 2],
+        "us_per_request": elapsed / requests * 1e6,
+    }
+
+
+def run(requests=2000, body_size=None):
+    """
+    Runs the benchmark
+    :param requests: number of requests to measure
+    :type requests: int
+    :param body_size: request body size, a small JSON by default
+    :type body_size: int
+    :return: median peak of memory allocated by a request
+        and time per request
+    :rtype: dict
+    """
+    return asyncio.run(measure(requests, body_size=body_size))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m fdk.tests.benchmarks.allocations",
+        description="Measures memory allocated per request")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--body-size", type=int,
+                        help="request body size in bytes, "
+                             "at most 10 such requests are sent")
+    args = parser.parse_args(argv)
+
+    results = run(requests=args.requests, body_size=args.body_size)
+    print("peak allocated: {0} bytes per request".format(
+        results["peak_bytes"]))
+    if args.body_size:
+        print("peak allocated: {0:.2f}x body size".format(
+            results["peak_bytes"] / args.body_size))
+    print("time: {0:.1f}us per request".format(results["us_per_request"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
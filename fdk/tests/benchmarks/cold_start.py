@@ -0,0 +1,240 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Cold-start benchmark: starts the fdk entry point against a temporary
+# Unix domain socket and measures the time to the FN_LISTENER symlink
+# and to the first successful /call.
+#
+#   python -m fdk.tests.benchmarks.cold_start --runs 10 --save base.json
+#   python -m fdk.tests.benchmarks.cold_start --runs 10 --compare base.json
+
+import argparse
+import json
+import os
+import platform
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fdk import constants
+
+FUNCS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "funcs")
+FUNCS = {
+    "echo": os.path.join(FUNCS_DIR, "echo.py"),
+    "heavy": os.path.join(FUNCS_DIR, "heavy.py"),
+    "async": os.path.join(FUNCS_DIR, "async_echo.py"),
+}
+METRICS = ("symlink", "first_call")
+ROOT_DIR = os.path.dirname(
+    os.path.dirname(os.path.abspath(constants.__file__)))
+
+START_TIMEOUT = 30
+POLL_INTERVAL = 0.001
+DEFAULT_TOLERANCE = 0.2
+
+FDK_MAIN = "from fdk.scripts.fdk import main; main()"
+CALL = (b"POST /call HTTP/1.1\r\n"
+        b"Fn-Call-Id: cold-start\r\n"
+        b"Content-Length: 2\r\n\r\n{}")
+
+
+def call(socket_path):
+    """
+    Sends a /call request
+    :param socket_path: path to the FN_LISTENER socket
+    :type socket_path: str
+    :return: HTTP status code
+    :rtype: int
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(START_TIMEOUT)
+        sock.connect(socket_path)
+        sock.sendall(CALL)
+        head = b""
+        while b"\r\n" not in head:
+            chunk = sock.recv(65536)
+            if not chunk:
+                raise ConnectionResetError("connection closed")
+            head += chunk
+        return int(head.split(b" ", 2)[1])
+
+
+def wait_for(condition, started, proc):
+    while not condition():
+        if proc.poll() is not None:
+            raise RuntimeError("fdk exited with {0}".format(proc.returncode))
+        if time.monotonic() - started > START_TIMEOUT:
+            raise TimeoutError("fdk did not start in {0}s".format(
+                START_TIMEOUT))
+        time.sleep(POLL_INTERVAL)
+    return time.monotonic() - started
+
+
+def first_call_succeeded(socket_path):
+    try:
+        return call(socket_path) == 200
+    except OSError:
+        return False
+
+
+def measure(func_path, env=None):
+    """
+    Starts a function once and times its cold start
+    :param func_path: path to a function module
+    :type func_path: str
+    :param env: extra environment variables
+    :type env: dict
+    :return: seconds to the symlink and to the first call
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "lsnr.sock")
+        proc_env = dict(os.environ)
+        proc_env.update({
+            constants.FN_FORMAT: constants.HTTPSTREAM,
+            constants.FN_LISTENER: "unix:" + socket_path,
+            "PYTHONPATH": ROOT_DIR,
+        })
+        proc_env.update(env or {})
+
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            [sys.executable, "-c", FDK_MAIN, func_path, "handler"],
+            env=proc_env, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL)
+        try:
+            symlink = wait_for(
+                lambda: os.path.islink(socket_path), started, proc)
+            first_call = wait_for(
+                lambda: first_call_succeeded(socket_path), started, proc)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(START_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    return {"symlink": symlink, "first_call": first_call}
+
+
+def summary(samples):
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+def run(funcs=None, runs=5, env=None):
+    """
+    Runs the benchmark
+    :param funcs: sample function names, all of them by default
+    :type funcs: list
+    :param runs: number of cold starts per function
+    :type runs: int
+    :param env: extra environment variables
+    :type env: dict
+    :return: benchmark results
+    :rtype: dict
+    """
+    results = {}
+    for name in funcs or sorted(FUNCS):
+        samples = [measure(FUNCS[name], env=env) for _ in range(runs)]
+        results[name] = {
+            metric: summary([s[metric] for s in samples])
+            for metric in METRICS
+        }
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "runs": runs,
+        "results": results,
+    }
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    Finds metrics whose median got slower than a baseline's
+    by more than the tolerance
+    :param baseline: baseline results
+    :type baseline: dict
+    :param current: current results
+    :type current: dict
+    :param tolerance: allowed slowdown, 0.2 is 20%
+    :type tolerance: float
+    :return: regressions: function, metric, baseline and current medians
+    :rtype: list
+    """
+    regressions = []
+    for name, metrics in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in METRICS:
+            was = base[metric]["median"]
+            now = metrics[metric]["median"]
+            if now > was * (1 + tolerance):
+                regressions.append((name, metric, was, now))
+    return regressions
+
+
+def report(results, out=sys.stdout):
+    for name, metrics in sorted(results["results"].items()):
+        print("{0:<8} {1}".format(name, "  ".join(
+            "{0}: {1:.3f}s (min {2:.3f}s, max {3:.3f}s)".format(
+                metric, m["median"], m["min"], m["max"])
+            for metric, m in metrics.items())), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m fdk.tests.benchmarks.cold_start",
+        description="Measures fdk cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--func", action="append", choices=sorted(FUNCS),
+                        help="sample function, all of them by default")
+    parser.add_argument("--save", help="write results to a JSON file")
+    parser.add_argument("--compare", help="JSON baseline to compare with")
+    parser.add_argument("--tolerance", type=float,
+                        default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run(funcs=args.func, runs=args.runs)
+    report(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, tolerance=args.tolerance)
+        for name, metric, was, now in regressions:
+            print("REGRESSION {0} {1}: {2:.3f}s -> {3:.3f}s".format(
+                name, metric, was, now))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# stands for a function that imports a lot before it can serve a call
+import argparse  # noqa: F401
+import csv  # noqa: F401
+import dataclasses  # noqa: F401
+import decimal  # noqa: F401
+import email.mime.multipart  # noqa: F401
+import email.mime.text  # noqa: F401
+import http.client  # noqa: F401
+import io
+import json
+import logging.handlers  # noqa: F401
+import sqlite3  # noqa: F401
+import statistics  # noqa: F401
+import tarfile  # noqa: F401
+import unittest.mock  # noqa: F401
+import urllib.request  # noqa: F401
+import uuid  # noqa: F401
+import xml.etree.ElementTree  # noqa: F401
+import zipfile  # noqa: F401
+
+
+def handler(ctx, data: io.BytesIO = None):
+    return json.dumps({"size": len(data.getvalue())})
@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+# Response header serialization microbenchmark: times the header block
+# of a typical fdk response with the cached serializer and with
+# the former per-response encoding.
+#
+#   python -m fdk.tests.benchmarks.headers --number 100000
+
+import argparse
+import sys
+import timeit
+
+from fdk import constants
+from fdk.async_http import response
+from fdk.async_http.exceptions import STATUS_CODES
+
+HEADERS = dict(constants.FDK_RESPONSE_HEADERS, **{
+    "Content-Type": "application/json",
+    "Fn-Http-Status": "200",
+    "Fn-Http-H-Cache-Control": "no-cache",
+})
+BODY = b'{"message":"Hello World"}'
+
+
+def legacy_output_head(resp, version="1.1", keep_alive=False,
+                       keep_alive_timeout=None):
+    """
+    Header block as it used to be built: bytes concatenation
+    and encoding of every name, value and status line
+    """
+    timeout_header = b""
+    if keep_alive and keep_alive_timeout is not None:
+        timeout_header = b"Keep-Alive: %d\r\n" % keep_alive_timeout
+
+    resp.headers["Content-Type"] = resp.headers.get(
+        "Content-Type", resp.content_type)
+
+    headers = b""
+    for name, value in resp.headers.items():
+        try:
+            headers += b"%b: %b\r\n" % (
+                name.encode(), value.encode("utf-8"))
+        except AttributeError:
+            headers += b"%b: %b\r\n" % (
+                str(name).encode(), str(value).encode("utf-8"))
+
+    if resp.status == 200:
+        status = b"OK"
+    else:
+        status = STATUS_CODES.get(resp.status, b"UNKNOWN RESPONSE")
+
+    return (
+        b"HTTP/%b %d %b\r\n" b"Connection: %b\r\n" b"%b" b"%b\r\n"
+    ) % (
+        version.encode(),
+        resp.status,
+        status,
+        b"keep-alive" if keep_alive else b"close",
+        timeout_header,
+        headers,
+    )
+
+
+def make_response(headers=None, status=200):
+    resp = response.HTTPResponse(
+        headers=HEADERS if headers is None else headers,
+        status=status, body_bytes=BODY)
+    resp.headers["Content-Length"] = len(BODY)
+    return resp
+
+
+def run(number=100000):
+    """
+    Runs the benchmark
+    :param number: number of header blocks per serializer
+    :type number: int
+    :return: nanoseconds per response for each serializer
+    :rtype: dict
+    """
+    resp = make_response()
+    results = {}
+    for name, serialize in (("legacy", legacy_output_head),
+                            ("cached", type(resp).output_head)):
+        seconds = min(timeit.repeat(
+            lambda: serialize(resp, "1.1", True, 5),
+            number=number, repeat=3))
+        results[name] = seconds / number * 1e9
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m fdk.tests.benchmarks.headers",
+        description="Measures response header serialization")
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    results = run(number=args.number)
+    for name, ns in sorted(results.items()):
+        print("{0:<8} {1:.0f}ns per response".format(name, ns))
+    print("gain     {0:.0f}ns per response ({1:.1f}x)".format(
+        results["legacy"] - results["cached"],
+        results["legacy"] / results["cached"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+# Connection timer benchmark: keeps thousands of idle keep-alive
+# connections open, each with its timeouts armed, and measures requests
+# on one more connection, with timeouts scheduled on the event loop
+# and on the server's timer wheel.
+#
+#   python -m fdk.tests.benchmarks.timers --connections 5000
+
+import argparse
+import asyncio
+import functools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from fdk import event_handler
+from fdk import fixtures
+
+from fdk.async_http import app
+from fdk.async_http import protocol
+from fdk.async_http import router
+from fdk.async_http import server
+from fdk.async_http import timer
+
+REQUEST = (b"POST /call HTTP/1.1\r\n"
+           b"Fn-Call-Id: timers\r\n"
+           b"Content-Length: 2\r\n\r\n{}")
+KEEP_ALIVE_TIMEOUT = 600
+
+
+def handler(ctx, data=None):
+    return "ok"
+
+
+async def call(reader, writer):
+    writer.write(REQUEST)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    await reader.readexactly(length)
+
+
+async def measure(socket_path, connections, requests, wheel):
+    loop = asyncio.get_running_loop()
+    timers = timer.TimerWheel() if wheel else None
+    rtr = router.Router()
+    rtr.add("/call", frozenset({"POST"}),
+            event_handler.event_handle(fixtures.code(handler)))
+    srv = app.AsyncHTTPServer(name="timers", router=rtr)
+    factory = functools.partial(
+        protocol.HttpProtocol, loop=loop,
+        request_handler=srv.handle_request,
+        error_handler=srv.error_handler, signal=server.Signal(),
+        request_max_size=100000000,
+        keep_alive_timeout=KEEP_ALIVE_TIMEOUT, timers=timers)
+    server.update_current_time(loop, timers)
+    http_server = await loop.create_unix_server(
+        factory, socket_path, backlog=connections)
+
+    clients = []
+    try:
+        started = time.perf_counter()
+        for _ in range(connections):
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            await call(reader, writer)
+            clients.append(writer)
+        connected = time.perf_counter() - started
+
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        clients.append(writer)
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await call(reader, writer)
+            latencies.append(time.perf_counter() - started)
+
+        return {
+            "scheduled": len(loop._scheduled),
+            "wheel": len(timers) if timers is not None else 0,
+            "connect_ms": connected * 1e3,
+            "latency_us": statistics.median(latencies) * 1e6,
+        }
+    finally:
+        for writer in clients:
+            writer.close()
+        http_server.close()
+        await http_server.wait_closed()
+
+
+def run(connections=5000, requests=2000):
+    """
+    Runs the benchmark
+    :param connections: number of idle keep-alive connections
+    :type connections: int
+    :param requests: number of requests measured
+    :type requests: int
+    :return: loop scheduler and wheel sizes, time to open
+        the idle connections and median request latency, per mode
+    :rtype: dict
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("loop", "wheel"):
+            socket_path = os.path.join(tmp, mode + ".sock")
+            results[mode] = asyncio.run(measure(
+                socket_path, connections, requests, mode == "wheel"))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m fdk.tests.benchmarks.timers",
+        description="Measures connection timers")
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for mode, m in run(args.connections, args.requests).items():
+        print("{0:<6} loop timers: {1:<6} wheel timers: {2:<6} "
+              "connect: {3:.0f}ms  request: {4:.1f}us".format(
+                  mode, m["scheduled"], m["wheel"],
+                  m["connect_ms"], m["latency_us"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+# Response write benchmark: sends responses of different body sizes
+# over a Unix socket pair and compares joining the head with the body
+# into one buffer, writing the head and the body one after another,
+# and handing both to transport.writelines().
+#
+#   python -m fdk.tests.benchmarks.writes --runs 20
+
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+
+from fdk.async_http import response
+
+SIZES = {
+    "1KB": 1024,
+    "1MB": 1024 * 1024,
+    "50MB": 50 * 1024 * 1024,
+}
+RECEIVE_SIZE = 1024 * 1024
+
+
+def write_joined(transport, resp):
+    transport.write(resp.output("1.1", True, 5))
+
+
+def write_parts(transport, resp):
+    for data in resp.output_parts("1.1", True, 5):
+        transport.write(data)
+
+
+def write_lines(transport, resp):
+    transport.writelines(resp.output_parts("1.1", True, 5))
+
+
+MODES = {
+    "join": write_joined,
+    "write": write_parts,
+    "writelines": write_lines,
+}
+
+
+async def receive(loop, sock, buffer, size):
+    left = size
+    while left > 0:
+        n = await loop.sock_recv_into(sock, buffer)
+        if n == 0:
+            raise ConnectionResetError("connection closed")
+        left -= n
+
+
+async def measure(write, body_size, runs):
+    loop = asyncio.get_running_loop()
+    server_sock, client_sock = socket.socketpair()
+    client_sock.setblocking(False)
+    transport, _ = await loop.connect_accepted_socket(
+        asyncio.Protocol, server_sock)
+    buffer = bytearray(RECEIVE_SIZE)
+    body = b"x" * body_size
+    size = len(response.HTTPResponse(body_bytes=body).output("1.1", True, 5))
+
+    latencies = []
+    copied = []
+    try:
+        for _ in range(runs):
+            resp = response.HTTPResponse(body_bytes=body)
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                write(transport, resp)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            await receive(loop, client_sock, buffer, size)
+            latencies.append(time.perf_counter() - started)
+            copied.append(peak)
+    finally:
+        transport.close()
+        client_sock.close()
+
+    return {
+        "latency": statistics.median(latencies),
+        "copied": statistics.median(copied),
+    }
+
+
+def run(sizes=None, runs=20):
+    """
+    Runs the benchmark
+    :param sizes: body size names, all of them by default
+    :type sizes: list
+    :param runs: number of responses per size and mode
+    :type runs: int
+    :return: median latency in seconds and bytes allocated
+        by a write, per body size and mode
+    :rtype: dict
+    """
+    results = {}
+    for name in sizes or SIZES:
+        results[name] = {
+            mode: asyncio.run(measure(write, SIZES[name], runs))
+            for mode, write in MODES.items()
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m fdk.tests.benchmarks.writes",
+        description="Measures response writes")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--size", action="append", choices=list(SIZES),
+                        help="body size, all of them by default")
+    args = parser.parse_args(argv)
+
+    for name, modes in run(sizes=args.size, runs=args.runs).items():
+        for mode, m in modes.items():
+            print("{0:<5} {1:<10} {2:10.1f}us {3:12.0f} bytes copied".format(
+                name, mode, m["latency"] * 1e6, m["copied"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import gc
+import warnings
+
+import pytest
+
+from fdk import admission
+from fdk import constants
+from fdk import event_handler
+from fdk import fixtures
+
+from fdk.tests import funcs
+
+
+async def slow_coro(ctx, **kwargs):
+    await asyncio.sleep(0.2)
+    return "slow"
+
+
+def invoke(limiter, fn):
+    return event_handler.event_handle(fixtures.code(fn), limiter=limiter)(
+        fixtures.fake_request())
+
+
+def test_admitted_invocation_updates_service_time():
+    limiter = admission.ConcurrencyLimiter(1, 0)
+
+    http_resp = asyncio.run(invoke(limiter, funcs.coro))
+
+    assert 200 == http_resp.status
+    assert b"hello from coro" == http_resp.body
+    stats = limiter.stats()
+    assert 1 == stats["admitted"]
+    assert 0 == stats["in_flight"]
+    assert stats["service_time"] is not None
+
+
+def test_queue_full_rejection():
+    limiter = admission.ConcurrencyLimiter(1, 0)
+
+    async def run():
+        return await asyncio.gather(
+            invoke(limiter, slow_coro), invoke(limiter, slow_coro))
+
+    first, second = asyncio.run(run())
+
+    assert 200 == first.status
+    assert 503 == second.status
+    assert 1 == limiter.stats()["rejected_queue_full"]
+
+
+def test_queued_invocation_waits_for_slot():
+    limiter = admission.ConcurrencyLimiter(1, 1)
+
+    async def run():
+        return await asyncio.gather(
+            invoke(limiter, slow_coro), invoke(limiter, slow_coro))
+
+    first, second = asyncio.run(run())
+
+    assert (200, 200) == (first.status, second.status)
+    assert 0 == limiter.stats()["queue_depth"]
+
+
+def test_cancelled_queued_invocation_is_never_started():
+    limiter = admission.ConcurrencyLimiter(1, 1)
+
+    async def run():
+        first = asyncio.ensure_future(invoke(limiter, slow_coro))
+        queued = asyncio.ensure_future(invoke(limiter, slow_coro))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.gather(first, queued, return_exceptions=True)
+        return first.result()
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        first = asyncio.run(run())
+        gc.collect()
+
+    assert 200 == first.status
+    assert not [w for w in caught if "never awaited" in str(w.message)]
+    assert 1 == limiter.stats()["admitted"]
+
+
+async def slow_stream(ctx, **kwargs):
+    async def chunks():
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            yield "chunk"
+    return chunks()
+
+
+class StreamWriter(object):
+
+    def __init__(self):
+        self.chunks = []
+
+    async def write(self, chunk):
+        self.chunks.append(chunk)
+
+
+async def invoke_streaming(limiter, fn, delay=0):
+    # the response is streamed by the task that got it, like the server does
+    await asyncio.sleep(delay)
+    http_resp = await invoke(limiter, fn)
+    writer = StreamWriter()
+    if hasattr(http_resp, "streaming_fn"):
+        await http_resp.streaming_fn(writer)
+    return http_resp.status, writer.chunks
+
+
+def test_slot_is_held_while_response_streams():
+    limiter = admission.ConcurrencyLimiter(1, 0)
+
+    async def run():
+        return await asyncio.gather(*(
+            invoke_streaming(limiter, slow_stream, delay)
+            for delay in (0, 0.02, 0.04)))
+
+    results = asyncio.run(run())
+
+    assert (200, [b"chunk"] * 3) == results[0]
+    assert [503, 503] == [status for status, _ in results[1:]]
+    assert limiter.service_time >= 0.15
+    assert 0 == limiter.stats()["in_flight"]
+
+
+def test_deadline_shorter_than_service_time_rejection():
+    limiter = admission.ConcurrencyLimiter(1, 0)
+    limiter.service_time = constants.DEFAULT_DEADLINE * 2
+
+    http_resp = asyncio.run(invoke(limiter, funcs.coro))
+
+    assert 504 == http_resp.status
+    assert 1 == limiter.stats()["rejected_deadline"]
+    assert 0 == limiter.stats()["admitted"]
+
+
+def test_limiter_from_env(monkeypatch):
+    monkeypatch.setattr(admission, "__limiter__", None)
+    assert admission.start() is None
+
+    monkeypatch.setenv(constants.FDK_MAX_CONCURRENCY, "2")
+    monkeypatch.setenv(constants.FDK_MAX_QUEUE, "8")
+    limiter = admission.start()
+    assert limiter is admission.get_limiter()
+    assert (2, 8) == (limiter.max_concurrency, limiter.max_queue)
+
+    monkeypatch.setenv(constants.FDK_MAX_QUEUE, "-1")
+    with pytest.raises(ValueError):
+        admission.start()
@@ -0,0 +1,47 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+
+from fdk.tests.benchmarks import cold_start
+
+
+def results(**medians):
+    return {"results": {
+        name: {metric: {"median": median, "min": median, "max": median}
+               for metric in cold_start.METRICS}
+        for name, median in medians.items()
+    }}
+
+
+def test_cold_start_smoke(tmp_path):
+    baseline = tmp_path / "baseline.json"
+
+    assert 0 == cold_start.main(
+        ["--runs", "1", "--func", "echo", "--save", str(baseline)])
+
+    saved = json.loads(baseline.read_text())
+    echo = saved["results"]["echo"]
+    assert 0 < echo["symlink"]["median"] <= echo["first_call"]["median"]
+
+
+def test_compare_with_baseline():
+    baseline = results(echo=0.1, heavy=0.2)
+
+    assert [] == cold_start.compare(baseline, results(echo=0.11, async_=1))
+    assert [("heavy", "first_call", 0.2, 0.3),
+            ("heavy", "symlink", 0.2, 0.3)] == sorted(
+        cold_start.compare(baseline, results(echo=0.1, heavy=0.3)))
@@ -0,0 +1,41 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import pytest
+
+from fdk import constants
+
+
+def test_int_env(monkeypatch):
+    monkeypatch.delenv("FDK_TEST_SETTING", raising=False)
+    assert constants.int_env("FDK_TEST_SETTING") is None
+    assert 5 == constants.int_env("FDK_TEST_SETTING", 5)
+
+    monkeypatch.setenv("FDK_TEST_SETTING", "")
+    assert 5 == constants.int_env("FDK_TEST_SETTING", 5)
+
+    monkeypatch.setenv("FDK_TEST_SETTING", "0")
+    assert 0 == constants.int_env("FDK_TEST_SETTING", 5)
+    with pytest.raises(ValueError, match="at least 1"):
+        constants.int_env("FDK_TEST_SETTING", 5, minimum=1)
+
+    monkeypatch.setenv("FDK_TEST_SETTING", "-1")
+    with pytest.raises(ValueError, match="at least 0"):
+        constants.int_env("FDK_TEST_SETTING")
+
+    monkeypatch.setenv("FDK_TEST_SETTING", "1MB")
+    with pytest.raises(ValueError, match="must be an integer"):
+        constants.int_env("FDK_TEST_SETTING")
@@ -14,10 +14,19 @@
 # limitations under the License.
 #
 
+import asyncio
+import io
+import socket
+
 import pytest
 
+import fdk
+
 from fdk import constants
 from fdk import customer_code
+from fdk import fixtures
+from fdk import listener
+from fdk import runner
 
 from fdk.tests import funcs
 
@@ -53,3 +62,184 @@ def test_generic_delayed_loader():
     h = f.handler()
     assert h is not None
     assert f._delayed_module_class.executed is True
+
+
+WARMUP_FUNC = """
+import os
+
+warmed = []
+
+
+def handler(ctx, data=None):
+    return "warm" if warmed else "cold"
+
+
+def warmup(ctx):
+    warmed.append(ctx.Config().get("FN_APP_NAME"))
+"""
+
+
+def test_eager_load_warms_up_before_socket_is_published(
+        tmp_path, monkeypatch):
+    func_path = tmp_path / "func.py"
+    func_path.write_text(WARMUP_FUNC)
+    f = customer_code.Function(str(func_path))
+    socket_path = tmp_path / "lsnr.sock"
+    monkeypatch.setenv(constants.FDK_EAGER_LOAD, "true")
+    monkeypatch.setenv("FN_APP_NAME", "app")
+
+    served = []
+
+    def serve(handle_code, sock, loop=None, on_serving=None,
+              request_max_size=None):
+        sock.close()
+        served.append((
+            handle_code._delayed_module_class.executed,
+            handle_code.handler()(None),
+            socket_path.exists()))
+
+    monkeypatch.setattr(listener, "serve", serve)
+    loop = asyncio.new_event_loop()
+    try:
+        fdk.start(f, "unix:" + str(socket_path), loop=loop)
+    finally:
+        loop.close()
+
+    assert [(True, "warm", False)] == served
+    assert f.warmup() is not None
+
+
+ASYNC_WARMUP_FUNC = """
+import asyncio
+
+loops = []
+
+
+def handler(ctx, data=None):
+    return "ok"
+
+
+async def warmup(ctx):
+    loops.append(asyncio.get_running_loop())
+"""
+
+
+def test_async_warmup_runs_on_server_loop(tmp_path, monkeypatch):
+    func_path = tmp_path / "func.py"
+    func_path.write_text(ASYNC_WARMUP_FUNC)
+    f = customer_code.Function(str(func_path))
+    monkeypatch.setenv(constants.FDK_EAGER_LOAD, "true")
+    listener.warm_up(f)
+    loops = f.handler().__globals__["loops"]
+    assert [] == loops
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(tmp_path / "lsnr.sock"))
+    served = []
+
+    def on_serving():
+        loop = asyncio.get_event_loop()
+        served.append(list(loops) == [loop])
+        loop.call_soon(loop.stop)
+
+    fdk.serve(f, sock, on_serving=on_serving)
+
+    assert [True] == served
+
+
+def test_function_without_warmup_hook(monkeypatch):
+    f = customer_code.Function(funcs.__file__, entrypoint="dummy_func")
+    assert f.warmup() is None
+    assert f._delayed_module_class.executed is True
+
+
+LIFESPAN_FUNC = """
+import asyncio
+
+events = []
+
+
+async def on_startup(state):
+    await asyncio.sleep(0.01)
+    events.append("startup")
+    state.pool = "pool"
+
+
+def on_shutdown():
+    events.append("shutdown")
+
+
+def handler(ctx, data=None):
+    return ctx.State().pool
+"""
+
+
+def lifespan_function(tmp_path):
+    func_path = tmp_path / "func.py"
+    func_path.write_text(LIFESPAN_FUNC)
+    return customer_code.Function(str(func_path))
+
+
+def test_startup_hook_runs_once_on_first_calls(tmp_path):
+    f = lifespan_function(tmp_path)
+
+    async def run():
+        calls = [runner.handle_request(
+            f, constants.HTTPSTREAM,
+            headers=fixtures.setup_headers(), data=io.BytesIO())
+            for _ in range(3)]
+        responses = await asyncio.gather(*calls)
+        await f.shutdown()
+        return responses
+
+    responses = asyncio.run(run())
+
+    assert [b"pool"] * 3 == [r.body_bytes() for r in responses]
+    assert ["startup", "shutdown"] == f.handler().__globals__["events"]
+
+
+def test_lifespan_hooks_run_on_server_loop(tmp_path):
+    f = lifespan_function(tmp_path)
+    f.load()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(tmp_path / "lsnr.sock"))
+    events = f.handler().__globals__["events"]
+    served = []
+
+    def on_serving():
+        served.append(list(events))
+        asyncio.get_event_loop().call_soon(asyncio.get_event_loop().stop)
+
+    fdk.serve(f, sock, on_serving=on_serving)
+
+    assert [["startup"]] == served
+    assert ["startup", "shutdown"] == events
+    assert "pool" == f.state.pool
+
+
+def test_request_spill_size(monkeypatch):
+    monkeypatch.delenv(constants.FDK_REQUEST_SPILL_SIZE, raising=False)
+    assert listener.request_spill_size() is None
+
+    monkeypatch.setenv(constants.FDK_REQUEST_SPILL_SIZE, "0")
+    assert listener.request_spill_size() is None
+
+    monkeypatch.setenv(constants.FDK_REQUEST_SPILL_SIZE, "1048576")
+    assert 1048576 == listener.request_spill_size()
+
+    monkeypatch.setenv(constants.FDK_REQUEST_SPILL_SIZE, "1MB")
+    with pytest.raises(ValueError):
+        listener.request_spill_size()
+
+
+def test_max_request_size(monkeypatch):
+    monkeypatch.delenv(constants.FDK_REQUEST_MAX_SIZE, raising=False)
+    assert constants.DEFAULT_REQUEST_MAX_SIZE == listener.max_request_size()
+
+    monkeypatch.setenv(constants.FDK_REQUEST_MAX_SIZE, "1048576")
+    assert 1048576 == listener.max_request_size()
+
+    for size in ("0", "-1", "1MB"):
+        monkeypatch.setenv(constants.FDK_REQUEST_MAX_SIZE, size)
+        with pytest.raises(ValueError):
+            listener.max_request_size()
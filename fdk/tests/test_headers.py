@@ -14,6 +14,8 @@
 # limitations under the License.
 #
 
+import pytest
+
 from fdk import headers
 
 
@@ -117,3 +119,102 @@ def test_decap_headers_strip():
                                    "merge-header": "v3",
                                    "other-header": "bad"}, False)
     assert decap == {"foo-header": "v1", "merge-header": ["v2"]}
+
+
+def test_decap_gateway_headers():
+    request_headers = {"content-type": "text/plain",
+                       "fn-http-h-Content-Type": "application/json",
+                       "fn-http-h-merge-header": "v2",
+                       "fn-http-h-merge-Header": ["v3"],
+                       "fn-intent": "httprequest"}
+
+    merged, http = headers.decap_gateway_headers(request_headers)
+
+    assert merged == headers.decap_headers(request_headers, True)
+    assert http == headers.decap_headers(request_headers, False)
+
+
+def test_headers_lookup_is_case_insensitive():
+    h = headers.Headers({"Content-Type": "text/plain"})
+
+    assert "text/plain" == h["content-type"]
+    assert "text/plain" == h["CONTENT-TYPE"]
+    assert "text/plain" == h.get("Content-Type")
+    assert "Content-Type" in h
+    assert ["content-type"] == list(h)
+    assert {"content-type": "text/plain"} == h
+    assert h.get("accept") is None
+    with pytest.raises(KeyError):
+        h["Accept"]
+
+
+def test_headers_keep_repeated_values():
+    h = headers.Headers()
+    h.add("Set-Cookie", "a=1")
+    h.add("set-cookie", "b=2")
+    h.add("SET-COOKIE", ["c=3", "d=4"])
+    h.add("Accept", "*/*")
+
+    assert ["a=1", "b=2", "c=3", "d=4"] == h["set-cookie"]
+    assert ["a=1", "b=2", "c=3", "d=4"] == h.getlist("Set-Cookie")
+    assert ["*/*"] == h.getlist("accept")
+    assert [] == h.getlist("x-missing")
+    assert 2 == len(h)
+
+
+def test_headers_do_not_share_values():
+    values = ["v1"]
+    h = headers.Headers({"k": values})
+    h.add("k", "v2")
+    assert ["v1"] == values
+
+    copy = h.copy()
+    copy.add("k", "v3")
+    other = headers.Headers()
+    other["k"] = h["k"]
+    other.add("k", "v4")
+
+    assert ["v1", "v2"] == h["k"]
+    assert ["v1", "v2", "v3"] == copy["k"]
+    assert ["v1", "v2", "v4"] == other["k"]
+
+
+def test_headers_replace_and_remove():
+    h = headers.Headers()
+    h.add("X-Multi", "1")
+    h.add("X-Multi", "2")
+
+    h["x-multi"] = "3"
+    assert "3" == h["X-Multi"]
+    assert "3" == h.pop("X-MULTI")
+    assert "x-multi" not in h
+    assert "v" == h.setdefault("X-New", "v")
+    h.update({"X-New": "w"}, Other="o")
+    assert {"x-new": "w", "other": "o"} == h
+    del h["X-New"]
+    assert {"other": "o"} == h
+
+
+def test_header_names_are_interned():
+    name = "".join(["X-", "Interned"])
+
+    assert headers.header_name(name) is headers.header_name(b"x-interned")
+    assert "x-interned" == headers.header_name(name)
+
+
+def test_decap_gateway_headers_from_request_headers():
+    request_headers = headers.Headers()
+    for name, value in (("Fn-Intent", "httprequest"),
+                        ("Fn-Http-H-Accept", "text/plain"),
+                        ("Fn-Http-H-Accept", "application/json"),
+                        ("Accept", "*/*")):
+        request_headers.add(name, value)
+
+    merged, http = headers.decap_gateway_headers(request_headers)
+
+    assert ["text/plain", "application/json"] == http.getlist("Accept")
+    assert {"accept": ["text/plain", "application/json"],
+            "fn-intent": "httprequest"} == merged
+    # the request's own list is not shared
+    http.add("accept", "*/*")
+    assert 2 == len(request_headers["fn-http-h-accept"])
@@ -33,7 +33,7 @@ def test_override_content_type():
     assert "OK" == content
     assert headers.get("content-type") == "application/json"
     # we've had issues with 'Content-Type: None' slipping in
-    assert headers.get("Content-Type") is None
+    assert headers.getlist("Content-Type") == ["application/json"]
     assert headers.get(
         constants.FN_FDK_VERSION) == constants.VERSION_HEADER_VALUE
 
@@ -0,0 +1,63 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fdk
+
+SERVER_MODULES = ["asyncio", "httptools", "uvloop", "fdk.async_http",
+                  "fdk.listener", "fdk.event_handler"]
+
+
+def imported_modules(statement):
+    # a fresh interpreter, the test process has everything imported
+    code = "import sys; {0}; print(__import__('json').dumps(" \
+           "sorted(sys.modules)))".format(statement)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(fdk.__file__)))
+    out = subprocess.check_output(
+        [sys.executable, "-c", code], cwd=root,
+        env=dict(os.environ, PYTHONPATH=root))
+    return set(json.loads(out.decode()))
+
+
+@pytest.mark.parametrize("statement", [
+    "import fdk",
+    "from fdk import response",
+    "from fdk import context",
+])
+def test_import_does_not_load_server(statement):
+    modules = imported_modules(statement)
+    assert [] == [m for m in SERVER_MODULES if m in modules]
+
+
+def test_fixtures_do_not_load_http_server():
+    modules = imported_modules("from fdk import fixtures")
+    assert "fdk.async_http" not in modules
+    assert "httptools" not in modules
+
+
+def test_server_is_loaded_on_first_use():
+    modules = imported_modules("import fdk; fdk.handle")
+    assert "fdk.listener" in modules
+    assert "fdk.async_http.protocol" in modules
+
+    with pytest.raises(AttributeError):
+        fdk.no_such_attribute
@@ -0,0 +1,92 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import importlib.util
+import sys
+import zipfile
+
+import pytest
+
+from fdk import customer_code
+from fdk import pack
+
+PACKED_FUNC = """
+import packed_helper
+
+
+def handler(ctx, data=None):
+    return packed_helper.greet()
+"""
+
+PACKED_HELPER = """
+def greet():
+    return "hello from " + __file__
+"""
+
+
+@pytest.fixture
+def func_dir(tmp_path, monkeypatch):
+    (tmp_path / "packed_func.py").write_text(PACKED_FUNC)
+    (tmp_path / "packed_helper.py").write_text(PACKED_HELPER)
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / "skipped.py").write_text("raise Exception()")
+    yield tmp_path
+    for name in ("packed_func", "packed_helper"):
+        sys.modules.pop(name, None)
+    monkeypatch.setattr(sys, "path", [
+        p for p in sys.path if not p.startswith(str(tmp_path))])
+
+
+def pyc_flags(path):
+    with open(path, "rb") as pyc:
+        return int.from_bytes(pyc.read(8)[4:8], "little")
+
+
+def test_compile_tree_writes_unchecked_hash_bytecode(func_dir):
+    assert 2 == pack.compile_tree(str(func_dir))
+
+    cfile = importlib.util.cache_from_source(str(func_dir / "packed_func.py"))
+    # hash-based, source is not checked
+    assert 0b01 == pyc_flags(cfile)
+    assert not (func_dir / ".venv" / "__pycache__").exists()
+
+
+def test_zipapp_holds_bytecode_only(func_dir):
+    target = pack.build_zipapp(str(func_dir / "packed_func.py"))
+
+    assert str(func_dir / "packed_func.pyz") == target
+    with zipfile.ZipFile(target) as archive:
+        assert ["packed_func.pyc", "packed_helper.pyc"] == sorted(
+            archive.namelist())
+
+
+def test_function_loads_from_zipapp(func_dir):
+    target = pack.build_zipapp(str(func_dir / "packed_func.py"))
+    (func_dir / "packed_func.py").unlink()
+    (func_dir / "packed_helper.py").unlink()
+
+    f = customer_code.Function(target)
+    assert isinstance(f._delayed_module_class, customer_code.PackedImport)
+
+    assert f.handler()(None).startswith(
+        "hello from " + str(func_dir / "packed_func.pyz"))
+
+
+def test_pack_command(func_dir, capsys):
+    assert 0 == pack.main([str(func_dir / "packed_func.py")])
+    assert "compiled 2 modules" in capsys.readouterr().out
+
+    assert "doesn't exist" in pack.main([str(func_dir / "missing.py")])
@@ -14,7 +14,62 @@
 # limitations under the License.
 #
 
+import array
+import asyncio
+import datetime as dt
+import io
+import socket
+import tracemalloc
+import types
+
+from fdk import constants
+from fdk import event_handler
+from fdk import fixtures
+from fdk import listener
+from fdk import response
+
+from fdk.async_http import app
 from fdk.async_http import protocol
+from fdk.async_http import request as http_request
+from fdk.async_http import response as http_response
+from fdk.async_http import router
+from fdk.async_http import server
+from fdk.async_http import timer
+
+from fdk.tests.benchmarks import allocations as allocations_benchmark
+from fdk.tests.benchmarks import headers as headers_benchmark
+
+
+class FakeTransport(object):
+
+    def __init__(self):
+        self.data = []
+        self.closed = False
+        self.paused = False
+        self.vectored = False
+
+    def write(self, data):
+        self.data.append(bytes(data))
+
+    def writelines(self, list_of_data):
+        self.vectored = True
+        for data in list_of_data:
+            self.write(data)
+
+    def close(self):
+        self.closed = True
+
+    def is_closing(self):
+        return self.closed
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def pause_reading(self):
+        self.paused = True
+
+    def resume_reading(self):
+        pass
 
 
 def http_protocol(**kwargs):
@@ -41,3 +96,936 @@ def test_keep_alive_time_left_after_time_is_set():
 
     time_left = p.keep_alive_time_left()
     assert 15 - 32 == time_left
+
+
+def handler_protocol(loop, fn, **kwargs):
+    kwargs.setdefault("request_max_size", 100000000)
+    rtr = router.Router()
+    rtr.add("/call", frozenset({"POST"}),
+            event_handler.event_handle(fixtures.code(fn)))
+    srv = app.AsyncHTTPServer(name="test", router=rtr)
+    return protocol.HttpProtocol(
+        loop=loop, request_handler=srv.handle_request,
+        error_handler=srv.error_handler, signal=server.Signal(),
+        **kwargs)
+
+
+def serving_protocol(loop, fn, **kwargs):
+    p = handler_protocol(loop, fn, **kwargs)
+    p.connection_made(FakeTransport())
+    return p
+
+
+async def socket_call(fn, body=b""):
+    loop = asyncio.get_running_loop()
+    server_sock, client_sock = socket.socketpair()
+    await loop.connect_accepted_socket(
+        lambda: handler_protocol(loop, fn), server_sock)
+    reader, writer = await asyncio.open_unix_connection(sock=client_sock)
+    try:
+        writer.write(call_request(body))
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+        headers = dict(
+            line.lower().split(b": ", 1)
+            for line in head.split(b"\r\n")[1:-2])
+        length = int(headers[b"content-length"])
+        return head, await asyncio.wait_for(reader.readexactly(length), 5)
+    finally:
+        writer.close()
+
+
+def call_request(body=b"", headers=b""):
+    return (b"POST /call HTTP/1.1\r\n"
+            b"Fn-Call-Id: call-1\r\n"
+            b"%bContent-Length: %d\r\n\r\n%b"
+            % (headers, len(body), body))
+
+
+def test_connection_lost_cancels_invocation():
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        cancelled = loop.create_future()
+
+        async def fn(ctx, data=None):
+            ctx.OnCancel(lambda: cancelled.set_result(ctx.Cancelled()))
+            started.set()
+            # work the handler keeps going regardless of task cancellation
+            await asyncio.shield(asyncio.sleep(10))
+
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request())
+        await asyncio.wait_for(started.wait(), 1)
+        p.connection_lost(None)
+        return await asyncio.wait_for(cancelled, 1)
+
+    assert asyncio.run(run()) is True
+
+
+def test_connection_lost_after_response_does_not_cancel():
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        contexts = []
+
+        def fn(ctx, data=None):
+            contexts.append(ctx)
+            return "OK"
+
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request())
+        for _ in range(10):
+            await asyncio.sleep(0)
+        p.connection_lost(None)
+        return p.transport.data, contexts[0]
+
+    data, ctx = asyncio.run(run())
+    assert data[0].startswith(b"HTTP/1.1 200 OK")
+    assert ctx.Cancelled() is False
+
+
+def test_streamed_request_body():
+    chunks = [b"a" * 10, b"b" * 10, b"c" * 10]
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        received = []
+
+        async def fn(ctx, data=None):
+            async for chunk in data:
+                received.append(chunk)
+            return "OK"
+
+        rtr = router.Router()
+        rtr.add("/call", frozenset({"POST"}),
+                event_handler.event_handle(fixtures.code(fn)), stream=True)
+        srv = app.AsyncHTTPServer(name="test", router=rtr)
+        transport = FakeTransport()
+        p = protocol.HttpProtocol(
+            loop=loop, request_handler=srv.handle_request,
+            error_handler=srv.error_handler, signal=server.Signal(),
+            request_max_size=100000000, router=rtr,
+            is_request_stream=rtr.is_request_stream,
+            request_buffer_queue_size=1)
+        p.connection_made(transport)
+
+        request = call_request(b"".join(chunks))
+        head = request[:-30]
+        p.data_received(head)
+        # the handler is running before the body arrives
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert p._request_handler_task is not None
+        assert not p._request_handler_task.done()
+
+        for chunk in chunks:
+            p.data_received(chunk)
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return received, transport
+
+    received, transport = asyncio.run(run())
+    assert chunks == received
+    assert transport.paused
+    assert transport.data[0].startswith(b"HTTP/1.1 200 OK")
+
+
+def test_pipelined_streamed_request_gets_whole_body():
+    chunks = [b"a" * 10, b"b" * 10, b"c" * 10]
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        received = []
+
+        async def fn(ctx, data=None):
+            if ctx.CallID() == "call-1":
+                return "first"
+            async for chunk in data:
+                received.append(chunk)
+            return "second"
+
+        rtr = router.Router()
+        rtr.add("/call", frozenset({"POST"}),
+                event_handler.event_handle(fixtures.code(fn)), stream=True)
+        srv = app.AsyncHTTPServer(name="test", router=rtr)
+        transport = FakeTransport()
+        p = protocol.HttpProtocol(
+            loop=loop, request_handler=srv.handle_request,
+            error_handler=srv.error_handler, signal=server.Signal(),
+            request_max_size=100000000, router=rtr,
+            is_request_stream=rtr.is_request_stream,
+            request_buffer_queue_size=1)
+        p.connection_made(transport)
+
+        # the second request is parsed in full while the first one
+        # is handled, its chunks wait in the backlog
+        p.data_received(call_id_request(b"call-1"))
+        for chunk in [call_id_request(b"call-2", b"".join(chunks))[:-30],
+                      *chunks]:
+            p.data_received(chunk)
+        while len(transport.data) < 2:
+            await asyncio.wait_for(p._request_handler_task, 1)
+            await asyncio.sleep(0)
+        return received, transport
+
+    received, transport = asyncio.run(run())
+
+    assert chunks == received
+    bodies = [d.split(b"\r\n\r\n", 1)[1] for d in transport.data]
+    assert [b"first", b"second"] == bodies
+
+
+def test_unread_stream_does_not_stall_next_request():
+
+    async def fn(ctx, data=None):
+        if ctx.CallID() == "call-2":
+            return (await data.readall()).decode()
+        # responds without reading the body
+        return "unread"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        rtr = router.Router()
+        rtr.add("/call", frozenset({"POST"}),
+                event_handler.event_handle(fixtures.code(fn)), stream=True)
+        srv = app.AsyncHTTPServer(name="test", router=rtr)
+        transport = FakeTransport()
+        p = protocol.HttpProtocol(
+            loop=loop, request_handler=srv.handle_request,
+            error_handler=srv.error_handler, signal=server.Signal(),
+            request_max_size=100000000, router=rtr,
+            is_request_stream=rtr.is_request_stream,
+            request_buffer_queue_size=1)
+        p.connection_made(transport)
+
+        first = call_id_request(b"call-1", b"x" * 30)
+        for chunk in (first[:-30], first[-30:-20], first[-20:-10],
+                      first[-10:], call_id_request(b"call-2", b"body")):
+            p.data_received(chunk)
+        while len(transport.data) < 2:
+            await asyncio.wait_for(p._request_handler_task, 1)
+            await asyncio.sleep(0)
+        return transport
+
+    transport = asyncio.run(run())
+
+    bodies = [d.split(b"\r\n\r\n", 1)[1] for d in transport.data]
+    assert [b"unread", b"body"] == bodies
+
+
+def test_stream_stops_at_deadline():
+    cancelled = []
+    contexts = []
+
+    async def fn(ctx, data=None):
+        contexts.append(ctx)
+
+        async def chunks():
+            for i in range(5):
+                await asyncio.sleep(0.1)
+                cancelled.append(ctx.Cancelled())
+                yield "chunk-%d;" % i
+        return chunks()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        deadline = dt.datetime.now(dt.timezone.utc).astimezone() + \
+            dt.timedelta(seconds=0.15)
+        p.data_received(call_request(
+            headers=b"Fn-Deadline: %b\r\n" % deadline.isoformat().encode()))
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return b"".join(p.transport.data)
+
+    written = asyncio.run(run())
+
+    assert b"chunk-0;" in written
+    assert b"chunk-2;" not in written
+    assert [False] == cancelled
+    assert contexts[0].Cancelled()
+
+
+def test_sync_handler_gets_whole_body_with_streaming_on(monkeypatch):
+    monkeypatch.setenv(constants.FDK_REQUEST_STREAM, "true")
+    bodies = []
+
+    def fn(ctx, data=None):
+        bodies.append(data.read())
+        return "OK"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        code = fixtures.code(fn)
+        rtr = router.Router()
+        rtr.add("/call", frozenset({"POST"}),
+                event_handler.event_handle(code),
+                stream=listener.request_stream(code))
+        srv = app.AsyncHTTPServer(name="test", router=rtr)
+        transport = FakeTransport()
+        p = protocol.HttpProtocol(
+            loop=loop, request_handler=srv.handle_request,
+            error_handler=srv.error_handler, signal=server.Signal(),
+            request_max_size=100000000, router=rtr,
+            is_request_stream=rtr.is_request_stream)
+        p.connection_made(transport)
+        p.data_received(call_request(b"body"))
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return transport
+
+    transport = asyncio.run(run())
+
+    assert [b"body"] == bodies
+    assert transport.data[0].startswith(b"HTTP/1.1 200 OK")
+
+
+def stream_output(fn):
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request())
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return b"".join(p.transport.data)
+
+    return asyncio.run(run())
+
+
+def test_generator_response_is_streamed():
+
+    def rows():
+        yield "{\"n\": 1}\n"
+        yield b""
+        yield b"{\"n\": 2}\n"
+
+    def fn(ctx, data=None):
+        return response.Response(
+            ctx, response_data=rows(),
+            headers={"Content-Type": "application/x-ndjson"})
+
+    head, body = stream_output(fn).split(b"\r\n\r\n", 1)
+
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert b"transfer-encoding: chunked" in head.lower()
+    assert b"content-length" not in head.lower()
+    assert 1 == head.lower().count(b"content-type: application/x-ndjson")
+    assert b"9\r\n{\"n\": 1}\n\r\n9\r\n{\"n\": 2}\n\r\n0\r\n\r\n" == body
+
+
+def test_async_generator_response_is_streamed():
+
+    async def fn(ctx, data=None):
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield str(i)
+
+    head, body = stream_output(fn).split(b"\r\n\r\n", 1)
+
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert b"1\r\n0\r\n1\r\n1\r\n1\r\n2\r\n0\r\n\r\n" == body
+
+
+def test_file_response_is_sent_with_sendfile(tmp_path, monkeypatch):
+    payload = bytes(range(256)) * 1024
+    path = tmp_path / "blob"
+    path.write_bytes(payload)
+    opened = []
+
+    def fn(ctx, data=None):
+        f = open(path, "rb")
+        f.seek(1024)
+        opened.append(f)
+        return f
+
+    head, body = asyncio.run(socket_call(fn))
+
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert payload[1024:] == body
+    assert opened[0].closed
+
+
+def test_path_response_without_loop_sendfile(tmp_path, monkeypatch):
+    payload = b"x" * 100000
+    path = tmp_path / "blob"
+    path.write_bytes(payload)
+
+    async def no_sendfile(*args, **kwargs):
+        raise NotImplementedError()
+
+    monkeypatch.setattr(asyncio.AbstractEventLoop, "sendfile", no_sendfile)
+    monkeypatch.setattr(asyncio.BaseEventLoop, "sendfile", no_sendfile)
+
+    def fn(ctx, data=None):
+        return response.Response(
+            ctx, response_data=path,
+            headers={"Content-Type": "application/x-blob"})
+
+    head, body = asyncio.run(socket_call(fn))
+
+    assert b"content-type: application/x-blob" in head.lower()
+    assert payload == body
+
+
+def test_buffer_response_is_not_joined_with_headers():
+    numbers = array.array("i", range(10000))
+
+    def fn(ctx, data=None):
+        return memoryview(numbers)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request())
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return p.transport.data
+
+    head, body = asyncio.run(run())
+
+    assert b"content-length: %d\r\n" % len(numbers.tobytes()) in head
+    assert numbers.tobytes() == body
+
+
+def test_buffer_response_of_ints_over_socket():
+    numbers = array.array("i", range(500000))
+
+    def fn(ctx, data=None):
+        return memoryview(numbers)
+
+    head, body = asyncio.run(socket_call(fn))
+
+    # large enough for partial writes to the socket
+    assert b"content-length: %d\r\n" % len(numbers.tobytes()) in head
+    assert numbers.tobytes() == body
+
+
+def test_streamed_buffer_of_ints_is_sent_as_bytes():
+    numbers = array.array("i", range(10))
+
+    async def fn(ctx, data=None):
+        yield memoryview(numbers)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request())
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return b"".join(p.transport.data)
+
+    written = asyncio.run(run())
+
+    assert b"\r\n28\r\n" + numbers.tobytes() + b"\r\n0\r\n" in written
+
+
+def test_header_block_matches_former_serializer():
+    for headers, status in (
+            (headers_benchmark.HEADERS, 200),
+            ({"Fn-Http-H-Flag": True, "X-Utf": "ünïcode"}, 502)):
+        for _ in range(2):
+            # the second round serializes cached lines
+            resp = headers_benchmark.make_response(headers, status)
+            expected = headers_benchmark.legacy_output_head(
+                resp, "1.1", True, 5)
+            assert expected == resp.output_head("1.1", True, 5)
+
+
+def test_per_request_header_lines_are_not_cached():
+    cached = dict(http_response._header_cache)
+    for i in range(100):
+        resp = http_response.HTTPResponse(
+            headers={"Fn-Call-Id": "call-{0}".format(i)}, body_bytes=b"ok")
+        assert b"fn-call-id: call-%d\r\n" % i in resp.output_head()
+
+    assert cached == http_response._header_cache
+
+
+def test_repeated_headers_are_written_as_separate_lines():
+    resp = http_response.HTTPResponse(
+        headers={"X-List": ["a", "b"]}, body_bytes=b"ok")
+    resp.headers.add("Set-Cookie", "a=1")
+    resp.headers.add("set-cookie", "b=2")
+
+    head = resp.output_head()
+
+    assert (b"x-list: a\r\nx-list: b\r\n"
+            b"set-cookie: a=1\r\nset-cookie: b=2\r\n") in head
+
+
+def test_streaming_response_headers():
+    resp = http_response.StreamingHTTPResponse(
+        None, status=504, headers={"Content-Length": 10})
+
+    assert (b"HTTP/1.1 504 Gateway Timeout\r\n"
+            b"transfer-encoding: chunked\r\n"
+            b"content-type: text/plain\r\n\r\n") == resp.get_headers()
+
+
+def test_handler_response_is_written_as_is():
+    sent = http_response.HTTPResponse(body_bytes=b"ok")
+
+    async def handler(request):
+        return sent
+
+    rtr = router.Router()
+    rtr.add("/call", frozenset({"POST"}), handler)
+    srv = app.AsyncHTTPServer(name="test", router=rtr)
+    request = types.SimpleNamespace(path="/call", method="POST")
+    written = []
+
+    asyncio.run(srv.handle_request(request, written.append, None))
+
+    assert [sent] == written
+
+
+def test_request_headers_are_not_copied():
+    seen = []
+
+    def fn(ctx, data=None):
+        seen.append(ctx.Headers())
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request(headers=b"X-Custom: 1\r\n"))
+        request = p.request
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return request
+
+    request = asyncio.run(run())
+
+    assert "1" == request.headers["x-custom"]
+    assert [request.headers] == seen
+    assert request.headers is seen[0]
+
+
+def test_repeated_request_headers_are_kept():
+    seen = []
+
+    def fn(ctx, data=None):
+        seen.append((ctx.Headers().getlist("X-Forwarded-For"),
+                     ctx.Headers().get("FN-CALL-ID")))
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        p.data_received(call_request(
+            headers=b"X-Forwarded-For: 10.0.0.1\r\n"
+                    b"x-forwarded-for: 10.0.0.2\r\n"))
+        await asyncio.wait_for(p._request_handler_task, 1)
+
+    asyncio.run(run())
+
+    assert [(["10.0.0.1", "10.0.0.2"], "call-1")] == seen
+
+
+def test_large_body_is_read_in_place():
+    payload = bytes(range(256)) * 4096
+    bodies = []
+
+    def fn(ctx, data=None):
+        bodies.append(data.getvalue())
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        for body in (payload, b"small"):
+            allocations_benchmark.receive(p, call_request(body))
+            await asyncio.wait_for(p._request_handler_task, 1)
+        return p.transport.data
+
+    written = asyncio.run(run())
+
+    assert isinstance(bodies[0], bytearray)
+    assert payload == bodies[0]
+    assert b"small" == bodies[1]
+    assert 2 == len([d for d in written if d.startswith(b"HTTP/1.1 200")])
+
+
+def test_preallocated_body_grows_to_declared_length(monkeypatch):
+    monkeypatch.setattr(http_request, "BODY_PREALLOCATE_SIZE", 100000)
+    payload = bytes(range(256)) * 4096
+    bodies = []
+
+    def fn(ctx, data=None):
+        bodies.append(data.getvalue())
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        request = call_request(payload)
+        head = len(request) - len(payload)
+        # the first body bytes come along with the head
+        p.data_received(request[:head + 1000])
+        assert 100000 == len(p._incoming.body)
+        allocations_benchmark.receive(p, request[head + 1000:])
+        await asyncio.wait_for(p._request_handler_task, 1)
+
+    asyncio.run(run())
+
+    assert [payload] == bodies
+    assert len(payload) == len(bodies[0])
+
+
+def test_declared_length_is_not_preallocated():
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, lambda ctx, data=None: "ok")
+        request = call_request(b"x" * (64 * 1024 * 1024))
+        allocations_benchmark.receive(p, request[:1024 * 1024])
+        return len(p._incoming.body)
+
+    allocated = asyncio.run(run())
+
+    assert allocated <= http_request.BODY_PREALLOCATE_SIZE
+
+
+def test_large_body_over_socket():
+    payload = bytes(range(256)) * 8192
+
+    def fn(ctx, data=None):
+        return response.Response(ctx, response_data=data.read())
+
+    head, body = asyncio.run(socket_call(fn, body=payload))
+
+    assert head.startswith(b"HTTP/1.1 200")
+    assert payload == body
+
+
+def test_body_reader():
+    body = bytearray(b"0123456789")
+    reader = http_request.BodyReader(body)
+
+    assert body is reader.getvalue()
+    assert b"012" == reader.read(3)
+    target = bytearray(4)
+    assert 4 == reader.readinto(target)
+    assert b"3456" == target
+    assert b"789" == reader.read()
+    assert b"" == reader.read()
+    assert 2 == reader.seek(-8, io.SEEK_END)
+    assert [b"23456789"] == reader.readlines()
+    with reader.getbuffer() as view:
+        assert 10 == view.nbytes
+    reader.close()
+
+
+def spilled_call(request, spill_size, files=None):
+    bodies = []
+
+    def fn(ctx, data=None):
+        if files is not None:
+            files.append(data)
+        bodies.append((data.seekable(), data.read()))
+        data.seek(0)
+        return response.Response(ctx, response_data=data.read())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn, request_spill_size=spill_size)
+        transport = p.transport
+        tracemalloc.start()
+        try:
+            allocations_benchmark.receive(p, request)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        await asyncio.wait_for(p._request_handler_task, 5)
+        return peak, transport.data
+
+    peak, written = asyncio.run(run())
+    return bodies, peak, written
+
+
+def test_large_body_is_spilled_to_file():
+    payload = bytes(range(256)) * 16384
+
+    bodies, peak, written = spilled_call(
+        call_request(payload), len(payload) // 2)
+
+    assert [(True, payload)] == bodies
+    assert peak < len(payload) // 4
+    assert payload == b"".join(written).split(b"\r\n\r\n", 1)[1]
+
+
+def test_spilled_body_is_closed_after_response():
+    payload = b"x" * 4096
+    files = []
+
+    bodies, _, written = spilled_call(
+        call_request(payload), len(payload) // 2, files)
+
+    assert [(True, payload)] == bodies
+    assert files[0].closed
+
+
+def test_spilled_body_is_closed_on_connection_lost():
+    payload = b"x" * 4096
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, lambda ctx, data=None: "ok",
+                             request_spill_size=len(payload) // 2)
+        allocations_benchmark.receive(p, call_request(payload)[:-100])
+        spill = p._incoming.body
+        p.connection_lost(None)
+        return spill
+
+    spill = asyncio.run(run())
+
+    assert spill.closed
+
+
+def test_chunked_body_is_spilled_to_file():
+    chunk = bytes(range(256)) * 256
+    request = (b"POST /call HTTP/1.1\r\n"
+               b"Fn-Call-Id: call-1\r\n"
+               b"Transfer-Encoding: chunked\r\n\r\n"
+               + b"%x\r\n%b\r\n" % (len(chunk), chunk) * 16
+               + b"0\r\n\r\n")
+
+    bodies, _, written = spilled_call(request, len(chunk) * 4)
+
+    assert [(True, chunk * 16)] == bodies
+    assert written[0].startswith(b"HTTP/1.1 200")
+
+
+def test_large_response_is_written_with_writelines(monkeypatch):
+    monkeypatch.setattr(protocol, "VECTORED_WRITES", True)
+    payload = b"x" * (http_response.SMALL_BODY_SIZE + 1)
+
+    def fn(ctx, data=None):
+        return response.Response(ctx, response_data=payload)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        transport = p.transport
+        p.data_received(call_request())
+        await asyncio.wait_for(p._request_handler_task, 1)
+        return transport
+
+    transport = asyncio.run(run())
+
+    assert transport.vectored
+    head, body = transport.data
+    assert head.startswith(b"HTTP/1.1 200")
+    assert payload == body
+
+
+def call_id_request(call_id, body=b""):
+    return (b"POST /call HTTP/1.1\r\n"
+            b"Fn-Call-Id: %b\r\n"
+            b"Content-Length: %d\r\n\r\n%b" % (call_id, len(body), body))
+
+
+def test_pipelined_requests_are_responded_in_order():
+    started = []
+
+    async def fn(ctx, data=None):
+        started.append(ctx.CallID())
+        # the first call takes longer than the ones behind it
+        await asyncio.sleep(0.05 if ctx.CallID() == "call-1" else 0)
+        return ctx.CallID() + ":" + data.getvalue().decode()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        transport = p.transport
+        parser = None
+        pipelined = b"".join(
+            call_id_request(b"call-%d" % i, b"body-%d" % i)
+            for i in range(1, 4))
+        # the second request's head arrives with the first one's tail
+        for chunk in (pipelined[:50], pipelined[50:]):
+            p.data_received(chunk)
+            parser = parser or p.parser
+        for _ in range(3):
+            while p._request_handler_task is None:
+                await asyncio.sleep(0)
+            await asyncio.wait_for(p._request_handler_task, 1)
+        assert parser is p.parser
+        return transport
+
+    transport = asyncio.run(run())
+
+    assert ["call-1", "call-2", "call-3"] == started
+    bodies = [d.split(b"\r\n\r\n", 1)[1] for d in transport.data]
+    assert [b"call-1:body-1", b"call-2:body-2", b"call-3:body-3"] == bodies
+    assert not transport.closed
+
+
+def test_pipelined_requests_pause_reading_when_queue_is_full():
+
+    async def fn(ctx, data=None):
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn)
+        transport = p.transport
+        count = protocol.PIPELINE_DEPTH + 2
+        p.data_received(b"".join(
+            call_id_request(b"call-%d" % i) for i in range(count)))
+        paused = transport.paused
+        while len(transport.data) < count:
+            await asyncio.wait_for(p._request_handler_task, 1)
+            await asyncio.sleep(0)
+        return paused, transport
+
+    paused, transport = asyncio.run(run())
+
+    assert paused
+    assert protocol.PIPELINE_DEPTH + 2 == len(transport.data)
+
+
+def test_keep_alive_timeout_on_timer_wheel(monkeypatch):
+    monkeypatch.setattr(protocol, "current_time", 100)
+
+    async def fn(ctx, data=None):
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        wheel = timer.TimerWheel()
+        p = serving_protocol(loop, fn, keep_alive_timeout=1, timers=wheel)
+        transport = p.transport
+        # the request timeout is armed on connect
+        assert 1 == len(wheel)
+        p.data_received(call_id_request(b"call"))
+        await asyncio.wait_for(p._request_handler_task, 1)
+        assert 1 == len(transport.data)
+        # the loop's scheduler is not used
+        assert not any(h._callback.__self__ is p
+                       for h in loop._scheduled
+                       if hasattr(h._callback, "__self__"))
+        # no response timeout is left behind, only the keep-alive one
+        assert 1 == len(wheel)
+        protocol.current_time = 105
+        for _ in range(3):
+            wheel.tick()
+        return transport, wheel
+
+    transport, wheel = asyncio.run(run())
+
+    assert transport.closed
+    assert 0 == len(wheel)
+
+
+def test_update_current_time_advances_timers(monkeypatch):
+    monkeypatch.setattr(protocol, "current_time", None)
+    wheel = timer.TimerWheel()
+    fired = []
+    wheel.call_later(0, fired.append, "timeout")
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        server.update_current_time(loop, wheel)
+        now = protocol.current_time
+        for h in list(loop._scheduled):
+            h.cancel()
+        return now
+
+    assert asyncio.run(run()) is not None
+    assert ["timeout"] == fired
+
+
+def rejected_call(data, request_max_size):
+    calls = []
+
+    def fn(ctx, data=None):
+        calls.append(ctx.CallID())
+        return "ok"
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        p = serving_protocol(loop, fn, request_max_size=request_max_size)
+        transport = p.transport
+        for offset in range(0, len(data), 1024):
+            p.data_received(data[offset:offset + 1024])
+        while p._request_handler_task is not None:
+            await asyncio.wait_for(p._request_handler_task, 1)
+            await asyncio.sleep(0)
+        return p, transport
+
+    p, transport = asyncio.run(run())
+    return calls, p, transport
+
+
+def test_declared_body_over_limit_is_rejected_before_reading():
+    head = (b"POST /call HTTP/1.1\r\n"
+            b"fn-call-id: call-1\r\n"
+            b"content-length: 1048576\r\n\r\n")
+
+    calls, p, transport = rejected_call(head + b"x" * 4096, 65536)
+
+    assert [] == calls
+    assert 1 == len(transport.data)
+    assert transport.data[0].startswith(b"HTTP/1.1 413")
+    assert transport.paused
+    assert transport.closed
+    # the body sent after the head is dropped
+    assert p._rejected and p._incoming is None
+
+
+def test_chunked_body_over_limit_is_rejected():
+    chunk = b"x" * 4096
+    request = (b"POST /call HTTP/1.1\r\n"
+               b"Fn-Call-Id: call-1\r\n"
+               b"Transfer-Encoding: chunked\r\n\r\n"
+               + b"%x\r\n%b\r\n" % (len(chunk), chunk) * 64
+               + b"0\r\n\r\n")
+
+    calls, p, transport = rejected_call(request, 65536)
+
+    assert [] == calls
+    assert 1 == len(transport.data)
+    assert transport.data[0].startswith(b"HTTP/1.1 413")
+    assert transport.closed
+    assert p._total_request_size <= 65536 + 1024
+
+
+def test_request_over_limit_is_rejected_after_pipelined_ones():
+    pipelined = (call_id_request(b"call-1", b"body")
+                 + call_id_request(b"call-2", b"x" * 8192)
+                 + call_id_request(b"call-3", b"body"))
+
+    calls, _, transport = rejected_call(pipelined, 4096)
+
+    assert ["call-1"] == calls
+    assert 2 == len(transport.data)
+    assert transport.data[0].startswith(b"HTTP/1.1 200")
+    assert transport.data[1].startswith(b"HTTP/1.1 413")
+    assert transport.closed
+
+
+def test_request_just_under_limit_is_accepted():
+    body = b"x" * 600
+    request = call_id_request(b"call-1", body)
+    # the URL, header names and values and the body count
+    size = len(b"/call" b"Fn-Call-Id" b"call-1" b"Content-Length" b"600"
+               + body)
+
+    calls, _, transport = rejected_call(request, size)
+
+    assert ["call-1"] == calls
+    assert 1 == len(transport.data)
+    assert transport.data[0].startswith(b"HTTP/1.1 200")
+    assert not transport.closed
+
+    calls, _, transport = rejected_call(request, size - 1)
+
+    assert [] == calls
+    assert transport.data[0].startswith(b"HTTP/1.1 413")
+
+
+def test_server_run_keeps_default_request_size_limit(monkeypatch):
+    served = {}
+    monkeypatch.setattr(app, "serve",
+                        lambda *args, **kwargs: served.update(kwargs))
+
+    app.AsyncHTTPServer(name="test", router=router.Router()).run()
+
+    assert constants.DEFAULT_REQUEST_MAX_SIZE == served["request_max_size"]
@@ -0,0 +1,330 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import datetime as dt
+import io
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from fdk import constants
+from fdk import executor
+from fdk import fixtures
+from fdk import log
+from fdk import process_pool
+
+
+def thread_info(ctx, data=None):
+    return "{0}|{1}".format(
+        threading.current_thread().name, log.__fn_request_id__.get())
+
+
+@pytest.fixture
+def thread_executor(monkeypatch):
+    monkeypatch.setenv(constants.FDK_SYNC_EXECUTOR,
+                       constants.SYNC_EXECUTOR_THREAD)
+    monkeypatch.setenv(constants.FDK_SYNC_EXECUTOR_POOL_SIZE, "2")
+    yield
+    executor.shutdown()
+
+
+def test_sync_handler_inline_by_default():
+    call = asyncio.run(fixtures.setup_fn_call(
+        thread_info, headers={constants.FN_CALL_ID: "call-1"}))
+    content, status, headers = asyncio.run(call)
+
+    assert 200 == status
+    assert "{0}|call-1".format(
+        threading.current_thread().name) == content
+
+
+def test_sync_handler_in_thread_pool(thread_executor):
+    call = asyncio.run(fixtures.setup_fn_call(
+        thread_info, headers={constants.FN_CALL_ID: "call-2"}))
+    content, status, headers = asyncio.run(call)
+
+    thread_name, request_id = content.split("|")
+    assert 200 == status
+    assert thread_name.startswith("fdk-handler")
+    assert "call-2" == request_id
+
+
+def test_thread_pool_keeps_event_loop_responsive(thread_executor):
+    def blocker(ctx, data=None):
+        time.sleep(0.3)
+        return "done"
+
+    async def run():
+        call = await fixtures.setup_fn_call(blocker)
+        started = time.monotonic()
+        ticker = asyncio.ensure_future(asyncio.sleep(0.05))
+        result = asyncio.ensure_future(call)
+        await ticker
+        ticked = time.monotonic() - started
+        return ticked, await result
+
+    ticked, (content, status, headers) = asyncio.run(run())
+    assert ticked < 0.25
+    assert "done" == content
+
+
+def test_invalid_executor_mode(monkeypatch):
+    monkeypatch.setenv(constants.FDK_SYNC_EXECUTOR, "fibers")
+    with pytest.raises(ValueError):
+        executor.get_executor()
+
+
+def pid_func(ctx, data=None):
+    return "{0}|{1}".format(os.getpid(), data.getvalue().decode())
+
+
+def crash_func(ctx, data=None):
+    os._exit(1)
+
+
+def sleep_func(ctx, data=None):
+    time.sleep(10)
+
+
+@pytest.fixture
+def process_executor(monkeypatch):
+    monkeypatch.setenv(constants.FDK_SYNC_EXECUTOR,
+                       constants.SYNC_EXECUTOR_PROCESS)
+    monkeypatch.setenv(constants.FDK_SYNC_EXECUTOR_POOL_SIZE, "1")
+
+    def start(fn):
+        return process_pool.start(fixtures.code(fn))
+
+    yield start
+    process_pool.shutdown()
+
+
+def deadline_in(seconds):
+    now = dt.datetime.now(dt.timezone.utc).astimezone()
+    return (now + dt.timedelta(seconds=seconds)).isoformat()
+
+
+def test_process_pool_runs_function_in_worker(process_executor):
+    pool = process_executor(pid_func)
+
+    call = asyncio.run(fixtures.setup_fn_call(
+        pid_func, content=io.BytesIO(b"payload")))
+    content, status, headers = asyncio.run(call)
+
+    worker_pid, payload = content.decode().split("|")
+    assert 200 == status
+    assert int(worker_pid) == pool.workers[0].pid
+    assert int(worker_pid) != os.getpid()
+    assert "payload" == payload
+    assert headers.get(
+        constants.FN_FDK_VERSION) == constants.VERSION_HEADER_VALUE
+
+
+def size_func(ctx, data=None):
+    return str(len(data.getvalue()))
+
+
+def test_process_pool_keeps_event_loop_responsive(process_executor):
+    pool = process_executor(size_func)
+    worker = pool.workers[0]
+    # a stopped worker cannot drain a body larger than the socket buffer
+    body = io.BytesIO(b"x" * (16 * 1024 * 1024))
+    os.kill(worker.pid, signal.SIGSTOP)
+    resume = threading.Timer(0.5, os.kill, (worker.pid, signal.SIGCONT))
+
+    async def run():
+        started = time.monotonic()
+        ticker = asyncio.ensure_future(asyncio.sleep(0.05))
+        result = asyncio.ensure_future(worker.invoke({}, body, 10))
+        resume.start()
+        await ticker
+        ticked = time.monotonic() - started
+        return ticked, await result
+
+    try:
+        ticked, (status, headers, content) = asyncio.run(run())
+    finally:
+        resume.join()
+    assert ticked < 0.4
+    assert 200 == status
+    assert str(len(body.getvalue())).encode() == content
+
+
+def test_process_pool_restarts_crashed_worker(process_executor):
+    pool = process_executor(crash_func)
+    crashed_pid = pool.workers[0].pid
+
+    call = asyncio.run(fixtures.setup_fn_call(crash_func))
+    content, status, headers = asyncio.run(call)
+
+    assert 502 == status
+    assert pool.workers[0].pid is not None
+    assert pool.workers[0].pid != crashed_pid
+
+
+def test_process_pool_respects_deadline(process_executor):
+    pool = process_executor(sleep_func)
+    slow_pid = pool.workers[0].pid
+
+    started = time.monotonic()
+    call = asyncio.run(fixtures.setup_fn_call(
+        sleep_func, deadline=deadline_in(0.5)))
+    content, status, headers = asyncio.run(call)
+
+    assert 504 == status
+    assert time.monotonic() - started < 5
+    assert pool.workers[0].pid != slow_pid
+
+
+def test_coroutine_cancelled_at_deadline():
+    cancelled = []
+
+    async def slow_coro(ctx, data=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    started = time.monotonic()
+    call = asyncio.run(fixtures.setup_fn_call(
+        slow_coro, deadline=deadline_in(0.3)))
+    content, status, headers = asyncio.run(call)
+
+    assert 504 == status
+    assert time.monotonic() - started < 2
+    assert [True] == cancelled
+
+
+def test_sync_handler_sees_cancellation_at_deadline(thread_executor):
+    observed = threading.Event()
+
+    def cooperative(ctx, data=None):
+        while not ctx.Cancelled():
+            time.sleep(0.01)
+        observed.set()
+
+    started = time.monotonic()
+    call = asyncio.run(fixtures.setup_fn_call(
+        cooperative, deadline=deadline_in(0.3)))
+    content, status, headers = asyncio.run(call)
+
+    assert 504 == status
+    assert time.monotonic() - started < 2
+    assert observed.wait(2)
+
+
+def test_expired_deadline_skips_function():
+    calls = []
+
+    def func(ctx, data=None):
+        calls.append(ctx)
+
+    call = asyncio.run(fixtures.setup_fn_call(
+        func, deadline=deadline_in(-1)))
+    content, status, headers = asyncio.run(call)
+
+    assert 504 == status
+    assert [] == calls
+
+
+def gen_func(ctx, data=None):
+    yield str(os.getpid())
+    yield "|done"
+
+
+def thread_gen_func(ctx, data=None):
+    yield threading.current_thread().name
+    yield "|done"
+
+
+def test_thread_pool_advances_generator(thread_executor):
+    call = asyncio.run(fixtures.setup_fn_call(thread_gen_func))
+    content, status, headers = asyncio.run(call)
+
+    thread_name, done = content.decode().split("|")
+    assert 200 == status
+    assert thread_name.startswith("fdk-handler")
+    assert "done" == done
+
+
+def test_process_pool_collects_generator(process_executor):
+    pool = process_executor(gen_func)
+
+    call = asyncio.run(fixtures.setup_fn_call(gen_func))
+    content, status, headers = asyncio.run(call)
+
+    assert 200 == status
+    assert "{0}|done".format(pool.workers[0].pid).encode() == content
+
+
+def parent_pid(pid):
+    with open("/proc/{0}/stat".format(pid)) as stat:
+        return int(stat.read().rsplit(")", 1)[1].split()[1])
+
+
+def test_zygote_forks_and_respawns_workers(process_executor, monkeypatch):
+    monkeypatch.setenv(constants.FDK_ZYGOTE, "true")
+    pool = process_executor(crash_func)
+    template = pool.template
+    crashed_pid = pool.workers[0].pid
+    assert template.pid == parent_pid(crashed_pid)
+
+    call = asyncio.run(fixtures.setup_fn_call(crash_func))
+    content, status, headers = asyncio.run(call)
+
+    assert 502 == status
+    assert pool.workers[0].pid != crashed_pid
+    assert template.pid == parent_pid(pool.workers[0].pid)
+
+    template.stop()
+    # a dead zygote gets restarted on the next respawn
+    pool.workers[0].respawn()
+    assert pool.template.pid == parent_pid(pool.workers[0].pid)
+
+
+def open_fds(pid):
+    fd_dir = "/proc/{0}/fd".format(pid)
+    links = set()
+    for fd in os.listdir(fd_dir):
+        try:
+            links.add(os.readlink(os.path.join(fd_dir, fd)))
+        except FileNotFoundError:
+            pass
+    return links
+
+
+@pytest.mark.parametrize("use_zygote", ["false", "true"])
+def test_workers_do_not_inherit_descriptors(
+        process_executor, monkeypatch, use_zygote):
+    monkeypatch.setenv(constants.FDK_ZYGOTE, use_zygote)
+    read_end, write_end = os.pipe()
+    try:
+        pool = process_executor(pid_func)
+        call = asyncio.run(fixtures.setup_fn_call(
+            pid_func, content=io.BytesIO(b"payload")))
+        content, status, headers = asyncio.run(call)
+        pipe = os.readlink("/proc/self/fd/{0}".format(read_end))
+
+        assert 200 == status
+        assert pipe not in open_fds(pool.workers[0].pid)
+    finally:
+        os.close(read_end)
+        os.close(write_end)
@@ -0,0 +1,64 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import os
+
+from fdk import constants
+from fdk import fixtures
+from fdk import startup
+
+from fdk.tests import funcs
+
+
+def test_process_start_time_is_in_the_past():
+    started = startup.process_start_time()
+    if started is not None:
+        assert 0 < started <= startup.clock()
+
+
+def test_first_invocation_is_reported_once(tmp_path, monkeypatch):
+    trace = tmp_path / "startup.log"
+    monkeypatch.setattr(startup, "__trace__", str(trace))
+    monkeypatch.setattr(startup, "__first_call__", None)
+    monkeypatch.setattr(startup, "__marks__",
+                        [("fdk_import", startup.clock())])
+    startup.mark("handle")
+
+    for _ in range(2):
+        call = asyncio.run(fixtures.setup_fn_call(funcs.dummy_func))
+        content, status, headers = asyncio.run(call)
+        assert 200 == status
+
+    lines = trace.read_text().splitlines()
+    assert 1 == len(lines)
+    report, phases = lines[0].split(": ", 1)
+    assert "pid={0}".format(os.getpid()) in report
+    assert "call_id=" in report
+    names = [phase.split("=")[0] for phase in phases.split()]
+    assert ["fdk_import", "handle", "first_request",
+            "first_response"] == names
+    times = [float(phase.split("=")[1]) for phase in phases.split()]
+    assert times == sorted(times)
+
+
+def test_tracing_is_off_by_default(monkeypatch):
+    monkeypatch.delenv(constants.FDK_STARTUP_TRACE, raising=False)
+    monkeypatch.setattr(startup, "__trace__", None)
+    monkeypatch.setattr(startup, "__marks__", [])
+    startup.mark("handle")
+    assert [] == startup.__marks__
+    assert not startup.enabled()
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+from fdk.async_http import timer
+
+
+def test_timer_fires_after_its_delay():
+    wheel = timer.TimerWheel(size=8)
+    fired = []
+    wheel.call_later(3, fired.append, "timeout")
+
+    # the tick in progress does not count
+    for _ in range(3):
+        wheel.tick()
+        assert [] == fired
+    wheel.tick()
+
+    assert ["timeout"] == fired
+    assert 0 == len(wheel)
+
+
+def test_timer_more_than_a_turn_away():
+    wheel = timer.TimerWheel(size=4)
+    fired = []
+    wheel.call_later(9, fired.append, "timeout")
+
+    for _ in range(9):
+        wheel.tick()
+    assert [] == fired
+    wheel.tick()
+
+    assert ["timeout"] == fired
+
+
+def test_cancelled_timer_does_not_fire():
+    wheel = timer.TimerWheel(size=8)
+    fired = []
+    handle = wheel.call_later(1, fired.append, "timeout")
+
+    handle.cancel()
+    assert handle.cancelled()
+    assert 0 == len(wheel)
+    for _ in range(8):
+        wheel.tick()
+
+    assert [] == fired
+    # cancelling twice is fine
+    handle.cancel()
+
+
+def test_timer_cancelled_by_a_timer_due_at_the_same_tick():
+    wheel = timer.TimerWheel(size=8)
+    fired = []
+    handles = []
+
+    def cancel_others():
+        fired.append("first")
+        for handle in handles:
+            handle.cancel()
+
+    wheel.call_later(1, cancel_others)
+    handles.append(wheel.call_later(1, fired.append, "second"))
+    wheel.tick()
+    wheel.tick()
+
+    assert ["first"] == fired
+
+
+def test_failed_timer_does_not_stop_others():
+    wheel = timer.TimerWheel(size=8)
+    fired = []
+    wheel.call_later(0, lambda: 1 / 0)
+    wheel.call_later(0, fired.append, "timeout")
+    wheel.tick()
+
+    assert ["timeout"] == fired
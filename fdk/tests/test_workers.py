@@ -0,0 +1,76 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import signal
+
+import pytest
+
+from fdk import constants
+from fdk import workers
+
+
+def test_workers_count(monkeypatch):
+    assert 1 == workers.workers_count()
+
+    monkeypatch.setenv(constants.FDK_WORKERS, "4")
+    assert 4 == workers.workers_count()
+
+    monkeypatch.setenv(constants.FDK_WORKERS, "0")
+    with pytest.raises(ValueError):
+        workers.workers_count()
+
+
+def test_supervisor_restarts_dead_listener(monkeypatch):
+    monkeypatch.setattr(constants, "WORKER_RESTART_DELAY", 0)
+
+    def crash():
+        raise Exception("listener crashed")
+
+    supervisor = workers.Supervisor(1, crash)
+    spawned = []
+    spawn = supervisor.spawn
+
+    def counting_spawn(slot):
+        spawned.append(slot)
+        if len(spawned) == 3:
+            supervisor.stopping = True
+        spawn(slot)
+
+    supervisor.spawn = counting_spawn
+    supervisor.spawn(0)
+    supervisor.run()
+
+    assert [0, 0, 0] == spawned
+    assert {} == supervisor.children
+
+
+def test_supervisor_stopped_during_restart_delay(tmp_path, monkeypatch):
+    def listener():
+        (tmp_path / str(os.getpid())).touch()
+
+    supervisor = workers.Supervisor(1, listener)
+
+    def sleep(seconds):
+        # a stop signal arrives while a restart is delayed
+        supervisor.stop(signal.SIGTERM, None)
+
+    monkeypatch.setattr(workers.time, "sleep", sleep)
+    supervisor.spawn(0)
+    supervisor.run()
+
+    assert 1 == len(list(tmp_path.iterdir()))
+    assert {} == supervisor.children
@@ -0,0 +1,116 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import signal
+import time
+
+from fdk import constants
+from fdk import log
+
+
+STOP_SIGNALS = {signal.SIGINT, signal.SIGTERM}
+
+
+def workers_count():
+    """
+    Returns a number of listener processes
+    :return: number of processes
+    :rtype: int
+    """
+    return constants.int_env(constants.FDK_WORKERS, 1, minimum=1)
+
+
+class Supervisor(object):
+
+    def __init__(self, count, target):
+        """
+        Forks listener processes and restarts the ones that die
+        :param count: number of processes
+        :type count: int
+        :param target: process main function, never returns
+        :type target: callable
+        """
+        self.count = count
+        self.target = target
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self, slot):
+        # stop() runs on a signal, it is held off until a new listener
+        # is in self.children, so that stop() either kills it
+        # or the listener is not started at all
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        try:
+            if self.stopping:
+                return
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 0
+                try:
+                    signal.signal(signal.SIGINT, signal.SIG_DFL)
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+                    self.target()
+                except BaseException as ex:
+                    log.log("listener {0} failed: {1}".format(
+                        os.getpid(), ex))
+                    exit_code = 1
+                finally:
+                    os._exit(exit_code)
+
+            log.log("listener {0} started in slot {1}".format(pid, slot))
+            self.children[pid] = (slot, time.monotonic())
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+    def start(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for slot in range(self.count):
+            self.spawn(slot)
+
+    def stop(self, signum, frame):
+        log.log("stopping listeners on signal {0}".format(signum))
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """
+        Waits for listener processes, restarts the ones that die
+        until the supervisor is stopped
+        :return: None
+        """
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.children:
+                continue
+            slot, started = self.children.pop(pid)
+            log.log("listener {0} exited with status {1}".format(
+                pid, os.waitstatus_to_exitcode(status)))
+            if self.stopping:
+                continue
+            if time.monotonic() - started < constants.WORKER_RESTART_DELAY:
+                # do not spin on a listener that crashes on start
+                time.sleep(constants.WORKER_RESTART_DELAY)
+            self.spawn(slot)
@@ -0,0 +1,174 @@
+#
+# Copyright (c) 2019, 2020 Oracle and/or its affiliates. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import gc
+import os
+import signal
+import socket
+import struct
+
+from multiprocessing import connection
+
+from fdk import constants
+from fdk import log
+
+FORK_COMMAND = b"f"
+PID_FORMAT = "i"
+
+
+def is_enabled():
+    return os.environ.get(
+        constants.FDK_ZYGOTE, "").lower() in constants.TRUTHY_VALUES
+
+
+def prepare_child(keep):
+    """
+    Sets up a process forked off the server: closes inherited
+    descriptors, the agent must not see connections held open by it,
+    and restores default handling of the signals the server handles
+    :param keep: descriptor of the channel to the parent
+    :type keep: int
+    :return: None
+    """
+    os.closerange(3, keep)
+    os.closerange(keep + 1, os.sysconf("SC_OPEN_MAX"))
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+class Zygote(object):
+
+    def __init__(self, target, prepare=None):
+        """
+        Template process that forks ready workers on demand,
+        workers share its import-time memory through copy-on-write
+        :param target: worker main function, gets a channel to the parent
+        :type target: callable
+        :param prepare: called once in the template, i.e. to import modules
+        :type prepare: callable
+        """
+        self.target = target
+        self.prepare = prepare
+        self.pid = None
+        self.sock = None
+
+    def start(self):
+        parent_sock, zygote_sock = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                parent_sock.close()
+                prepare_child(zygote_sock.fileno())
+                self.serve(zygote_sock)
+            except BaseException as ex:
+                log.log("zygote {0} failed: {1}".format(os.getpid(), ex))
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        zygote_sock.close()
+        self.pid = pid
+        self.sock = parent_sock
+        log.log("zygote {0} started".format(pid))
+
+    def serve(self, sock):
+        """
+        Zygote main loop: forks a worker per parent's request
+        :param sock: parent process channel
+        :type sock: socket.socket
+        :return: None
+        """
+        if self.prepare is not None:
+            self.prepare()
+        # keeps import-time objects in pages shared with workers
+        gc.freeze()
+        # workers are reaped by the kernel, their parent only kills them
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        while True:
+            try:
+                command = sock.recv(1)
+            except OSError:
+                return
+            if command != FORK_COMMAND:
+                # the parent has gone
+                return
+
+            parent_end, worker_end = socket.socketpair()
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 0
+                try:
+                    sock.close()
+                    parent_end.close()
+                    prepare_child(worker_end.fileno())
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    self.target(connection.Connection(worker_end.detach()))
+                except BaseException as ex:
+                    log.log("worker {0} failed: {1}".format(os.getpid(), ex))
+                    exit_code = 1
+                finally:
+                    os._exit(exit_code)
+
+            worker_end.close()
+            socket.send_fds(sock, [struct.pack(PID_FORMAT, pid)],
+                            [parent_end.fileno()])
+            parent_end.close()
+
+    def fork(self):
+        """
+        Asks the zygote for a new worker, restarts a dead zygote
+        :return: worker's pid and a socket to it
+        :rtype: tuple
+        """
+        if self.pid is None:
+            self.start()
+        try:
+            return self.request_worker()
+        except OSError as ex:
+            log.log("zygote {0} is gone: {1}, restarting".format(
+                self.pid, ex))
+            self.stop()
+            self.start()
+            return self.request_worker()
+
+    def request_worker(self):
+        self.sock.sendall(FORK_COMMAND)
+        size = struct.calcsize(PID_FORMAT)
+        msg, fds, _, _ = socket.recv_fds(self.sock, size, 1)
+        if len(msg) != size or len(fds) != 1:
+            for fd in fds:
+                os.close(fd)
+            raise ConnectionResetError("no worker from the zygote")
+        pid, = struct.unpack(PID_FORMAT, msg)
+        return pid, socket.socket(fileno=fds[0])
+
+    def stop(self):
+        if self.pid is None:
+            return
+        self.sock.close()
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            pass
+        self.pid = None
+        self.sock = None